@@ -1,10 +1,35 @@
 from .create_input_cards import ConturSettings
 from .read_output import ConturResult
 from .run_contur import ConturApplication
-from .plot_results import gen_bl_thickness_plot, gen_bl_temperature_plot, gen_noz_characteristics, \
-    gen_throat_characteristics, gen_contours, gen_flow_angles, gen_flow_angles_throat
-from .create_report import save_all
+from .screening import ConturScreening
+from .adaptive import ConcurrencyController
+from .export_geometry import write_points, write_stl, write_ply, iter_wall_points, iter_surface_points, \
+    iter_surface_triangles
+from .export_arrow import result_to_arrow, results_to_arrow, write_parquet, write_parquet_dataset
 
-__all__ = ["ConturSettings", "ConturResult", "ConturApplication",
+__all__ = ["ConturSettings", "ConturResult", "ConturApplication", "ConturSurrogate", "ConvergenceStudy",
+           "ConturJacobian", "ConturScreening", "ConturFlowField",
+           "result_metrics", "batch_metrics", "register_metric",
+           "ConcurrencyController",
            "gen_bl_temperature_plot", "gen_bl_thickness_plot", "gen_noz_characteristics", "gen_throat_characteristics",
-           "gen_contours", "gen_flow_angles", "gen_flow_angles_throat", "save_all"]
+           "gen_contours", "gen_flow_angles", "gen_flow_angles_throat", "gen_sweep_contours",
+           "gen_sweep_bl_thickness_plot", "gen_sweep_noz_characteristics", "save_all",
+           "write_points", "write_stl", "write_ply", "iter_wall_points", "iter_surface_points", "iter_surface_triangles",
+           "result_to_arrow", "results_to_arrow", "write_parquet", "write_parquet_dataset"]
+
+# Plotting and reports import matplotlib, and the surrogate, convergence, sensitivity, flow field and metrics modules
+# scipy. Each is only loaded once one of its names is first used, so importing conturpy to write decks and run CONTUR
+# stays light.
+_LAZY = {"save_all": "create_report", "ConturSurrogate": "surrogate", "ConvergenceStudy": "convergence",
+         "ConturJacobian": "sensitivity", "ConturFlowField": "flow_field", "result_metrics": "metrics",
+         "batch_metrics": "metrics", "register_metric": "metrics"}
+_LAZY.update({name: "plot_results" for name in __all__ if name.startswith("gen_")})
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,181 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+
+def _usable_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory_mb():
+    # MemAvailable from /proc/meminfo on Linux, psutil elsewhere if installed, otherwise None
+    try:
+        with open('/proc/meminfo', 'r') as in_file:
+            for line in in_file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 1024 ** 2
+    except ImportError:
+        return None
+
+
+def cpu_load():
+    # One minute load average per usable CPU, or None where the platform has no load average
+    try:
+        return os.getloadavg()[0] / _usable_cpus()
+    except (AttributeError, OSError):
+        return None
+
+
+class ControllerStep(object):
+    def __init__(self, limit, throughput, latency, reason):
+        self.limit = limit
+        self.throughput = throughput
+        self.latency = latency
+        self.reason = reason
+
+    def __repr__(self):
+        return f"ControllerStep ({self.limit} workers: {self.throughput:.3g} runs/s, {self.latency:.3g} s per run, " \
+               f"{self.reason})"
+
+
+class ConcurrencyController(object):
+    def __init__(self, min_workers=1, max_workers=None, start=None, window=None, tolerance=.1, cpu_limit=None,
+                 memory_limit=None, max_latency=None):
+        # Hill climbing on throughput: after each window of completed runs the number of runs in flight moves one
+        # step, on in the same direction while throughput improves by more than tolerance and back when it drops. With
+        # no clear gain it steps down, so the fewest workers giving the best throughput are kept. cpu_limit (load
+        # average per CPU), memory_limit (MB that must stay available) and max_latency (mean seconds per run) force a
+        # step down whenever they are exceeded.
+        self.max_workers = _usable_cpus() if max_workers is None else max_workers
+        self.min_workers = min(min_workers, self.max_workers)
+        self.limit = min(self.max_workers, max(self.min_workers, self.max_workers // 2 if start is None else start))
+        self.window = window
+        self.tolerance = tolerance
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.max_latency = max_latency
+        self.direction = 1
+        self.history = []
+        self._reset(time.perf_counter())
+
+    def _reset(self, now):
+        self._window_start = now
+        self._latencies = []
+
+    def _caps_exceeded(self, latency):
+        if self.max_latency is not None and latency > self.max_latency:
+            return f"{latency:.3g} s per run, over {self.max_latency:g}"
+        if self.cpu_limit is not None:
+            load = cpu_load()
+            if load is not None and load > self.cpu_limit:
+                return f"load {load:.2f} over {self.cpu_limit:g}"
+        if self.memory_limit is not None:
+            memory = available_memory_mb()
+            if memory is not None and memory < self.memory_limit:
+                return f"{memory:.0f} MB available, under {self.memory_limit:g}"
+        return None
+
+    def completed(self, latency, now=None):
+        now = time.perf_counter() if now is None else now
+        self._latencies.append(latency)
+        window = max(4, 2 * self.limit) if self.window is None else self.window
+        if len(self._latencies) >= window:
+            self._adjust(now)
+
+    def _adjust(self, now):
+        throughput = len(self._latencies) / max(now - self._window_start, 1e-9)
+        latency = sum(self._latencies) / len(self._latencies)
+        previous = self.history[-1] if self.history else None
+
+        capped = self._caps_exceeded(latency)
+        if capped is not None:
+            self.direction = -1
+            reason = capped
+        elif previous is None:
+            reason = "first window"
+        elif throughput > previous.throughput * (1 + self.tolerance):
+            reason = "throughput up"
+        elif throughput < previous.throughput * (1 - self.tolerance):
+            self.direction = -self.direction
+            reason = "throughput down"
+        else:
+            self.direction = -1
+            reason = "no gain"
+
+        self.history.append(ControllerStep(self.limit, throughput, latency, reason))
+        new_limit = min(self.max_workers, max(self.min_workers, self.limit + self.direction))
+        if new_limit == self.limit and capped is None:
+            # At a bound: probe the other way next time
+            self.direction = -self.direction
+        self.limit = new_limit
+        self._reset(now)
+
+    def __repr__(self):
+        return f"ConcurrencyController ({self.limit} of {self.min_workers}-{self.max_workers} workers, " \
+               f"{len(self.history)} adjustments)"
+
+
+def _collect(pending, controller):
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    now = time.perf_counter()
+    for future in done:
+        item, submitted = pending.pop(future)
+        controller.completed(now - submitted, now)
+        try:
+            yield item, future.result()
+        except Exception as err:
+            yield item, err
+
+
+def iter_adaptive(application, inputs, output_dir=None, refine_amt=21, lean=False, controller=None, validate=True,
+                  compression=None):
+    # iter_batch with a varying number of runs in flight: the pool holds controller.max_workers processes and the
+    # controller sets how many of them are given work
+    from .run_contur import _run_batch_item
+    controller = ConcurrencyController() if controller is None else controller
+    executor = ProcessPoolExecutor(controller.max_workers)
+    jobs = ((item, application._batch_output_file(item, idx, output_dir, compression))
+            for idx, item in enumerate(inputs))
+    pending = {}
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < controller.limit:
+                try:
+                    item, output_file = next(jobs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                error = application._preflight(item) if validate else None
+                if error is not None:
+                    yield item, error
+                    continue
+                try:
+                    future = executor.submit(_run_batch_item, application, item, output_file, refine_amt, lean)
+                except BrokenProcessPool as err:
+                    # A worker died: as in iter_batch, the runs in flight are yielded with the error and a new pool
+                    # takes the rest
+                    import warnings
+                    warnings.warn(f"Process pool broke, starting a new one ({err})")
+                    while pending:
+                        yield from _collect(pending, controller)
+                    executor.shutdown(cancel_futures=True)
+                    executor = ProcessPoolExecutor(controller.max_workers)
+                    future = executor.submit(_run_batch_item, application, item, output_file, refine_amt, lean)
+                pending[future] = (item, time.perf_counter())
+            if not pending:
+                break
+            yield from _collect(pending, controller)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(cancel_futures=True)
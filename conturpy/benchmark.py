@@ -0,0 +1,183 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from .create_input_cards import ConturSettings
+from .run_contur import ConturApplication
+from . import f2py_backend
+
+MODES = ('batch_input_files', 'iter_batch', 'iter_batch_shared', 'iter_adaptive', 'pipeline')
+BACKENDS = ('executable', 'f2py')
+
+_STUB = """#!{python} -S
+# CONTUR stand-in for benchmarks: reads input.txt, spends {run_time} s ({mode}), then writes a canned output.txt
+import shutil
+import time
+
+start = time.perf_counter()
+with open('input.txt', 'r') as in_file:
+    in_file.read()
+if {mode!r} == 'cpu':
+    while time.perf_counter() - start < {run_time}:
+        pass
+else:
+    time.sleep({run_time})
+shutil.copyfile({output_file!r}, 'output.txt')
+"""
+
+
+def write_stub(directory, output_file, run_time=0.05, mode='sleep'):
+    # An executable script standing in for CONTUR (POSIX only: it relies on the #! line)
+    if mode not in ('sleep', 'cpu'):
+        raise Exception(f"Stub mode {mode} is not supported (use 'sleep' or 'cpu')")
+    stub = os.path.join(directory, 'contur_stub')
+    with open(stub, 'w') as out_file:
+        out_file.write(_STUB.format(python=sys.executable, run_time=run_time, mode=mode,
+                                    output_file=os.path.abspath(output_file)))
+    os.chmod(stub, os.stat(stub).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return stub
+
+
+class BenchmarkRun(object):
+    def __init__(self, mode, workers, runs, elapsed, failures, run_time, backend='executable'):
+        self.mode = mode
+        self.backend = backend
+        self.workers = workers
+        self.runs = runs
+        self.elapsed = elapsed
+        self.failures = failures
+        self.run_time = run_time
+        self.scaling = None
+
+    @property
+    def runs_per_second(self):
+        return self.runs / self.elapsed
+
+    @property
+    def overhead_per_run(self):
+        # Worker time spent on each run besides the stub's own run time: copies, process start, output handling and
+        # parsing. Runs of the real CONTUR have a run_time of 0, so this is their whole worker time per run
+        return self.elapsed * self.workers / self.runs - self.run_time
+
+    def __repr__(self):
+        scaling = "" if self.scaling is None else f"{self.scaling:8.2f}x"
+        return f"{self.backend:>10s} {self.mode:>18s} {self.workers:4d} {self.runs_per_second:10.2f} {1000 * self.overhead_per_run:12.1f} " \
+               f"{self.failures:8d} {scaling}"
+
+
+def _settings(runs):
+    settings = []
+    for idx in range(runs):
+        # A valid Mach 5 deck, so the pre-flight validation is timed as in real use; the stub ignores its contents
+        cs = ConturSettings()
+        cs['ITLE'] = f"BENCH{idx}"
+        cs['CMC'] = 5.
+        cs['SF'] = .325
+        settings.append(cs)
+    return settings
+
+
+def _time_mode(mode, application, runs, workers, work_dir, lean):
+    output_dir = tempfile.mkdtemp(dir=work_dir)
+    settings = _settings(runs)
+
+    if mode == 'batch_input_files':
+        # Input files are deleted once run, so each measurement writes its own
+        input_dir = tempfile.mkdtemp(dir=work_dir)
+        files = []
+        for cs in settings:
+            cs.print_to_input(f"{cs['ITLE']}.txt", input_dir)
+            files.append(os.path.join(input_dir, f"{cs['ITLE']}.txt"))
+        start = time.perf_counter()
+        results = application.batch_input_files(files, output_dir=output_dir, lean=lean)
+        elapsed = time.perf_counter() - start
+        failures = runs - len(results)
+    else:
+        start = time.perf_counter()
+        if mode == 'iter_adaptive':
+            stream = application.iter_adaptive(settings, output_dir=output_dir, lean=lean, max_workers=workers)
+        elif mode == 'pipeline':
+            stream = application.pipeline(settings, output_dir=output_dir, lean=lean, run_workers=workers,
+                                          parse_workers=0 if workers == 1 else workers)
+        else:
+            stream = application.iter_batch(settings, output_dir=output_dir, lean=lean, workers=workers,
+                                            transport='shared_memory' if mode == 'iter_batch_shared' else 'pickle')
+        failures = len([x for x in stream if isinstance(x[1], Exception)])
+        elapsed = time.perf_counter() - start
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return elapsed, failures
+
+
+def _applications(backends, work_dir, output_file, run_time, stub_mode, executable, extension):
+    # The executable backend runs the stub unless a real CONTUR executable is given. The f2py backend can't be stubbed:
+    # it always runs the real CONTUR through the extension, so both backends are best compared with executable set.
+    for backend in backends:
+        if backend not in BACKENDS:
+            raise Exception(f"Backend {backend} is not supported (use one of {', '.join(BACKENDS)})")
+        location = tempfile.mkdtemp(dir=work_dir)
+        if backend == 'f2py':
+            application = ConturApplication(location=location, timeout=5., backend='f2py',
+                                            executable=f2py_backend.extension_path() if extension is None else
+                                            extension)
+            yield backend, application, 0.
+        elif executable is not None:
+            yield backend, ConturApplication(location=location, timeout=5., executable=executable), 0.
+        else:
+            stub = write_stub(work_dir, output_file, run_time, stub_mode)
+            yield backend, ConturApplication(location=location, timeout=max(5., 20 * run_time), executable=stub), \
+                run_time
+
+
+def run_benchmark(output_file, runs=40, run_time=0.05, stub_mode='sleep', workers=(1, 2, 4), modes=MODES, lean=True,
+                  verbose=True, backends=('executable',), executable=None, extension=None):
+    # Times every execution mode of ConturApplication on each backend, by default with a stub executable that always
+    # writes output_file. Runs per second minus the known stub time gives the orchestration overhead of each mode, and
+    # the ratio to one worker of the same mode and backend its scaling. batch_input_files runs serially, so it is only
+    # timed with one worker.
+    for mode in modes:
+        if mode not in MODES:
+            raise Exception(f"Mode {mode} is not supported (use one of {', '.join(MODES)})")
+    records = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        if verbose:
+            print(f"{'backend':>10s} {'mode':>18s} {'jobs':>4s} {'runs/s':>10s} {'overhead ms':>12s} {'failures':>8s} "
+                  f"{'scaling':>9s}")
+        for backend, application, backend_run_time in _applications(backends, work_dir, output_file, run_time,
+                                                                     stub_mode, executable, extension):
+            for mode in modes:
+                base = None
+                for n_workers in ([1] if mode == 'batch_input_files' else workers):
+                    elapsed, failures = _time_mode(mode, application, runs, n_workers, work_dir, lean)
+                    record = BenchmarkRun(mode, n_workers, runs, elapsed, failures, backend_run_time, backend)
+                    base = record.runs_per_second if base is None else base
+                    record.scaling = record.runs_per_second / base
+                    records.append(record)
+                    if verbose:
+                        print(record)
+    return records
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m conturpy.benchmark',
+                                     description="Throughput of ConturApplication's execution modes and backends, "
+                                                 "with a stub CONTUR executable unless --executable is given")
+    parser.add_argument('output_file', help="CONTUR output the stub writes for every run")
+    parser.add_argument('--runs', type=int, default=40)
+    parser.add_argument('--run-time', type=float, default=0.05, help="Seconds the stub spends per run")
+    parser.add_argument('--stub-mode', choices=('sleep', 'cpu'), default='sleep')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=['executable'])
+    parser.add_argument('--executable', help="Real CONTUR executable to time instead of the stub")
+    parser.add_argument('--extension', help="CONTUR f2py extension for the f2py backend (default: the built one)")
+    args = parser.parse_args(argv)
+    run_benchmark(args.output_file, args.runs, args.run_time, args.stub_mode, args.workers, args.modes,
+                  backends=args.backends, executable=args.executable, extension=args.extension)
+
+
+if __name__ == '__main__':
+    main()
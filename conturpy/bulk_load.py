@@ -0,0 +1,90 @@
+import glob
+import hashlib
+import os
+import pickle
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from .read_output import ConturResult
+from .shared_results import call_shared, from_shared
+
+
+def expand_paths(paths_or_glob):
+    # A glob pattern ('**' searches subfolders), a single file, or a list of files
+    if isinstance(paths_or_glob, (str, os.PathLike)):
+        pattern = str(paths_or_glob)
+        if glob.has_magic(pattern):
+            return sorted(glob.glob(pattern, recursive=True))
+        return [pattern]
+    return [str(x) for x in paths_or_glob]
+
+
+def cache_file(path, cache_dir, refine_amt=21, lean=True):
+    # Named after the output, with a hash of its full path (outputs of the same name in different folders differ) and
+    # of the options it was parsed with
+    digest = hashlib.sha1(f"{os.path.abspath(path)}|{refine_amt}|{lean}".encode()).hexdigest()[:10]
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{digest}.pkl")
+
+
+def load_file(path, refine_amt=21, lean=True, cache=None):
+    # Parses one output, or reads its cached copy if that is newer than the output. Warnings raised while parsing are
+    # kept with the result in parse_warnings instead of being printed.
+    if cache is not None and os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        with open(cache, 'rb') as in_file:
+            return pickle.load(in_file)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        try:
+            r = ConturResult(path, refine_amt=refine_amt, lean=lean)
+        except Exception as err:
+            raise Exception(f"Unable to parse {path} ({type(err).__name__}: {err})") from err
+    r.parse_warnings = [str(x.message) for x in caught]
+    if r.nozzle_length is None:
+        raise Exception("No nozzle contour was read (not a complete CONTUR output)")
+
+    if cache is not None:
+        with open(cache, 'wb') as out_file:
+            pickle.dump(r, out_file, protocol=pickle.HIGHEST_PROTOCOL)
+    return r
+
+
+def load_many(paths_or_glob, workers=1, refine_amt=21, lean=True, cache_dir=None, executor=None, transport='pickle'):
+    # (path, ConturResult or the exception that stopped it) for every file, in the order given. Files are parsed in
+    # a process pool when workers > 1. With cache_dir each parsed result is also pickled there, and later loads read
+    # the pickle instead of parsing the output again while the output is unchanged.
+    if transport not in ('pickle', 'shared_memory'):
+        raise Exception(f"Transport {transport} is not supported")
+    paths = expand_paths(paths_or_glob)
+    if cache_dir is not None and not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    caches = [None if cache_dir is None else cache_file(x, cache_dir, refine_amt, lean) for x in paths]
+
+    if executor is None and workers == 1:
+        loaded = []
+        for path, cache in zip(paths, caches):
+            try:
+                loaded.append((path, load_file(path, refine_amt, lean, cache)))
+            except Exception as err:
+                loaded.append((path, err))
+        return loaded
+
+    own_executor = executor is None
+    executor = ProcessPoolExecutor(workers) if own_executor else executor
+    try:
+        if transport == 'shared_memory':
+            futures = [executor.submit(call_shared, load_file, path, refine_amt, lean, cache)
+                       for path, cache in zip(paths, caches)]
+        else:
+            futures = [executor.submit(load_file, path, refine_amt, lean, cache)
+                       for path, cache in zip(paths, caches)]
+        loaded = []
+        for path, future in zip(paths, futures):
+            try:
+                result = future.result()
+                loaded.append((path, from_shared(result) if transport == 'shared_memory' else result))
+            except Exception as err:
+                loaded.append((path, err))
+        return loaded
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,342 @@
+import csv
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .compressed import COMPRESSIONS, compression_of
+from .bulk_load import expand_paths, cache_file, load_file
+
+PARAMETER_FILES = ('.json', '.csv')
+FORMATS = ('parquet', 'pickle')
+
+
+def _value(text):
+    for ntype in (int, float):
+        try:
+            return ntype(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _cases(parameters):
+    # Every case combined with every point of the sweep (their full grid), each on top of the base values
+    import itertools
+    base = parameters.get('base', {})
+    cases = parameters.get('cases', [{}])
+    sweep = parameters.get('sweep', {})
+    for case in cases:
+        for point in itertools.product(*sweep.values()):
+            yield {**base, **case, **dict(zip(sweep, point))}
+
+
+def read_parameters(filename):
+    # ConturSettings from a parameter file. JSON: {"options": {...}, "base": {...}, "cases": [{...}], "sweep": {...}},
+    # with card labels as keys, ConturSettings keyword arguments in options and a list of values for each swept
+    # label. CSV: a header of card labels and one case per row. Cases without an ITLE are titled CASE0000, CASE0001...
+    from .create_input_cards import ConturSettings
+    if os.path.splitext(filename)[-1].lower() == '.csv':
+        with open(filename, 'r', newline='') as in_file:
+            rows = [{label: _value(text) for label, text in row.items() if text != ''}
+                    for row in csv.DictReader(in_file)]
+        parameters = {'cases': rows}
+    else:
+        with open(filename, 'r') as in_file:
+            parameters = json.load(in_file)
+
+    settings = []
+    for idx, values in enumerate(_cases(parameters)):
+        cs = ConturSettings(**parameters.get('options', {}))
+        values.setdefault('ITLE', f"CASE{idx:04d}")
+        for label, value in values.items():
+            cs[label] = value
+        settings.append(cs)
+    return settings
+
+
+def _inputs(paths):
+    # Decks for run: parameter files, folders of input cards, globs or input card files
+    inputs = []
+    for path in paths:
+        if os.path.splitext(path)[-1].lower() in PARAMETER_FILES:
+            inputs.extend(read_parameters(path))
+        elif os.path.isdir(path):
+            inputs.extend(sorted(os.path.join(path, x) for x in os.listdir(path) if x.endswith('.txt')))
+        else:
+            inputs.extend(expand_paths(path))
+    return inputs
+
+
+def _outputs(paths):
+    outputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            outputs.extend(sorted(os.path.join(path, x) for x in os.listdir(path)
+                                  if x.endswith('.txt') or compression_of(x) is not None))
+        else:
+            outputs.extend(expand_paths(path))
+    return outputs
+
+
+def _output_name(path):
+    # m5_result.txt.gz -> m5_result
+    name = os.path.basename(path)
+    if compression_of(name) is not None:
+        name = os.path.splitext(name)[0]
+    return os.path.splitext(name)[0]
+
+
+class Progress(object):
+    def __init__(self, total, verb, stream=None, quiet=False):
+        # One line per item as it finishes and a throughput summary at the end, on stderr so stdout stays free for
+        # the caller
+        self.total = total
+        self.verb = verb
+        self.stream = sys.stderr if stream is None else stream
+        self.quiet = quiet
+        self.done = 0
+        self.failures = 0
+        self.skipped = 0
+        self.start = time.perf_counter()
+
+    def _print(self, text):
+        print(text, file=self.stream, flush=True)
+
+    def update(self, name, error=None, skipped=False):
+        self.done += 1
+        self.failures += error is not None
+        self.skipped += skipped
+        if self.quiet and error is None:
+            return
+        status = "failed: " + str(error).splitlines()[0] if error is not None else "cached" if skipped else "ok"
+        width = len(str(self.total))
+        self._print(f"[{self.done:{width}d}/{self.total}] {self.elapsed:8.1f} s  {name}  {status}")
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def summary(self):
+        elapsed = self.elapsed
+        cached = f", {self.skipped} cached" if self.skipped else ""
+        self._print(f"{self.done} {self.verb}, {self.failures} failed{cached} in {elapsed:.2f} s "
+                    f"({self.done / max(elapsed, 1e-9):.2f}/s)")
+        return 1 if self.failures else 0
+
+
+def _collect(pending):
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        job = pending.pop(future)
+        try:
+            yield job, future.result()
+        except Exception as err:
+            yield job, err
+
+
+def _stream(func, jobs, workers=1, max_pending=None):
+    # (job, func(*job) or its exception) as each finishes, in a process pool when workers > 1. As in iter_batch, at
+    # most max_pending jobs are submitted at once and each future is dropped once yielded, so finished results do not
+    # accumulate.
+    if workers == 1:
+        for job in jobs:
+            try:
+                yield job, func(*job)
+            except Exception as err:
+                yield job, err
+        return
+
+    max_pending = 2 * workers if max_pending is None else max_pending
+    pending = {}
+    with ProcessPoolExecutor(workers) as executor:
+        try:
+            for job in jobs:
+                pending[executor.submit(func, *job)] = job
+                if len(pending) >= max_pending:
+                    yield from _collect(pending)
+            while pending:
+                yield from _collect(pending)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _report_file(path, directory, refine_amt=21, compression=None):
+    from .create_report import save_all
+    save_all(load_file(path, refine_amt, lean=False), directory, compression)
+    return directory
+
+
+def decks(args):
+    from .run_contur import ConturApplication
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    settings = read_parameters(args.parameters)
+    progress = Progress(len(settings), "decks", quiet=args.quiet)
+    for idx, cs in enumerate(settings):
+        name = ConturApplication._run_name(cs, idx)
+        problems = [] if args.no_validate else cs.validate(raise_error=False)
+        if problems:
+            progress.update(name, Exception("; ".join(problems)))
+            continue
+        cs.print_to_input(f"{name}.txt", args.output_dir)
+        progress.update(name)
+    return progress.summary()
+
+
+def run(args):
+    import tempfile
+    from .run_contur import ConturApplication
+    application = ConturApplication(timeout=args.timeout, executable=args.executable, backend=args.backend)
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    inputs = _inputs(args.inputs)
+    progress = Progress(len(inputs), "runs", quiet=args.quiet)
+
+    with tempfile.TemporaryDirectory() as deck_dir:
+        # Settings are written as decks named after their place in the full list, so outputs keep their names when
+        # --skip-existing leaves some out
+        pending = []
+        for idx, item in enumerate(inputs):
+            name = application._run_name(item, idx)
+            if args.skip_existing and \
+                    os.path.exists(application._batch_output_file(item, idx, args.output_dir, args.compression)):
+                progress.update(name, skipped=True)
+                continue
+            if hasattr(item, 'get_deck'):
+                problems = [] if args.no_validate else item.validate(raise_error=False)
+                if problems:
+                    progress.update(name, Exception("; ".join(problems)))
+                    continue
+                item.print_to_input(f"{name}.txt", deck_dir)
+                item = os.path.join(deck_dir, f"{name}.txt")
+            pending.append(item)
+
+        if args.adaptive:
+            stream = application.iter_adaptive(pending, output_dir=args.output_dir, lean=True,
+                                               compression=args.compression, min_workers=args.min_workers,
+                                               max_workers=args.workers)
+        else:
+            stream = application.iter_batch(pending, output_dir=args.output_dir, lean=True, workers=args.workers,
+                                            compression=args.compression)
+        for item, result in stream:
+            progress.update(application._run_name(item, None), result if isinstance(result, Exception) else None)
+    return progress.summary()
+
+
+def parse(args):
+    outputs = _outputs(args.outputs)
+    if args.cache_dir is not None and not os.path.exists(args.cache_dir):
+        os.makedirs(args.cache_dir)
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    progress = Progress(len(outputs), "outputs", quiet=args.quiet)
+
+    jobs = [(path, args.refine_amt, True, None if args.cache_dir is None else
+             cache_file(path, args.cache_dir, args.refine_amt, True)) for path in outputs]
+    run_ids = []
+
+    def parsed():
+        # Results go to Parquet as they arrive, in order of completion, so they are never all held at once
+        for job, result in _stream(load_file, jobs, args.workers):
+            name = _output_name(job[0])
+            if isinstance(result, Exception):
+                progress.update(name, result)
+                result = None
+            elif args.format == 'pickle':
+                with open(os.path.join(args.output_dir, f"{name}.pkl"), 'wb') as out_file:
+                    pickle.dump(result, out_file, protocol=pickle.HIGHEST_PROTOCOL)
+                progress.update(name)
+            else:
+                progress.update(name)
+            run_ids.append(name)
+            yield result
+
+    if args.format == 'parquet':
+        from .export_arrow import write_parquet_dataset
+        write_parquet_dataset(parsed(), args.output_dir, run_ids=run_ids, runs_per_file=args.runs_per_file)
+    else:
+        for _ in parsed():
+            pass
+    return progress.summary()
+
+
+def report(args):
+    outputs = _outputs(args.outputs)
+    progress = Progress(len(outputs), "reports", quiet=args.quiet)
+    jobs = [(path, os.path.join(args.output_dir, _output_name(path)), args.refine_amt, args.compression)
+            for path in outputs]
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    for job, result in _stream(_report_file, jobs, args.workers):
+        progress.update(_output_name(job[0]), result if isinstance(result, Exception) else None)
+    return progress.summary()
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m conturpy', description="Generate, run, parse and report CONTUR "
+                                                                          "batches without a Python driver")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-q', '--quiet', action='store_true', help="Only print failures and the summary")
+    common.add_argument('--show-warnings', action='store_true', help="Print the parser's warnings")
+
+    sub = commands.add_parser('decks', parents=[common], help="Write input cards from a parameter file")
+    sub.add_argument('parameters', help="JSON or CSV parameter file")
+    sub.add_argument('-o', '--output-dir', default='.')
+    sub.add_argument('--no-validate', action='store_true', help="Write decks that fail ConturSettings.validate()")
+    sub.set_defaults(func=decks)
+
+    sub = commands.add_parser('run', parents=[common], help="Run CONTUR on decks, parameter files or folders of them")
+    sub.add_argument('inputs', nargs='+', help="Input cards, folders or globs of them, or JSON/CSV parameter files")
+    sub.add_argument('-o', '--output-dir', default='.')
+    sub.add_argument('-j', '--workers', type=int, default=1, help="Simultaneous runs (the most with --adaptive)")
+    sub.add_argument('--adaptive', action='store_true', help="Tune the number of simultaneous runs to throughput")
+    sub.add_argument('--min-workers', type=int, default=1, help="Fewest simultaneous runs with --adaptive")
+    sub.add_argument('--timeout', type=float, default=5., help="Seconds before a run is abandoned")
+    sub.add_argument('--executable', help="CONTUR executable (default: the bundled one for this platform)")
+    sub.add_argument('--backend', choices=('executable', 'f2py'), default='executable')
+    sub.add_argument('--compression', choices=COMPRESSIONS, help="Compress saved outputs")
+    sub.add_argument('--skip-existing', action='store_true', help="Do not rerun decks whose output already exists")
+    sub.add_argument('--no-validate', action='store_true', help="Run decks that fail ConturSettings.validate()")
+    sub.set_defaults(func=run)
+
+    sub = commands.add_parser('parse', parents=[common], help="Parse outputs to Parquet tables or pickled results")
+    sub.add_argument('outputs', nargs='+', help="CONTUR outputs, folders or globs of them")
+    sub.add_argument('-o', '--output-dir', default='parsed')
+    sub.add_argument('-f', '--format', choices=FORMATS, default='parquet')
+    sub.add_argument('-j', '--workers', type=int, default=1)
+    sub.add_argument('--cache-dir', help="Keep parsed results here and reuse them while the outputs are unchanged")
+    sub.add_argument('--refine-amt', type=int, default=21)
+    sub.add_argument('--runs-per-file', type=int, default=100, help="Runs per Parquet file")
+    sub.set_defaults(func=parse)
+
+    sub = commands.add_parser('report', parents=[common], help="save_all reports, one folder per output")
+    sub.add_argument('outputs', nargs='+', help="CONTUR outputs, folders or globs of them")
+    sub.add_argument('-o', '--output-dir', default='reports')
+    sub.add_argument('-j', '--workers', type=int, default=1)
+    sub.add_argument('--compression', choices=COMPRESSIONS, help="Compress the report tables")
+    sub.add_argument('--refine-amt', type=int, default=21)
+    sub.set_defaults(func=report)
+    return parser
+
+
+def main(argv=None):
+    # Reports are drawn without a display
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    args = build_parser().parse_args(argv)
+    if not args.show_warnings:
+        # Every output gives parse warnings that would bury the progress lines; the environment variable carries the
+        # filter to spawned pool workers
+        import warnings
+        warnings.simplefilter('ignore')
+        os.environ['PYTHONWARNINGS'] = 'ignore'
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import os
+import shutil
+
+COMPRESSIONS = ('gz', 'xz', 'zst')
+
+
+def compression_of(filename):
+    extension = os.path.splitext(str(filename))[-1].lower().lstrip('.')
+    return extension if extension in COMPRESSIONS else None
+
+
+def compressed_name(filename, compression=None):
+    if compression is None or compression_of(filename) == compression:
+        return filename
+    if compression not in COMPRESSIONS:
+        raise Exception(f"Compression {compression} is not supported (use one of {', '.join(COMPRESSIONS)})")
+    return f"{filename}.{compression}"
+
+
+def _open_zstd(filename, mode):
+    try:
+        from compression import zstd
+        return zstd.open(filename, mode)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception("Reading or writing .zst files needs the zstandard package (pip install zstandard)")
+    return zstandard.open(filename, mode)
+
+
+def open_file(filename, mode='rt'):
+    # Opens plain, gzip, xz or zstd files alike, choosing by extension. Data is (de)compressed as it is read or written,
+    # so a compressed output is never expanded to disk.
+    compression = compression_of(filename)
+    if compression is None:
+        return open(filename, mode.replace('t', ''))
+    if compression == 'gz':
+        import gzip
+        return gzip.open(filename, mode)
+    if compression == 'xz':
+        import lzma
+        return lzma.open(filename, mode)
+    return _open_zstd(filename, mode)
+
+
+def write_text(filename, text, compression=None):
+    filename = compressed_name(filename, compression)
+    with open_file(filename, 'wt') as out_file:
+        out_file.write(text)
+    return filename
+
+
+def copy_file(src, dest, compression=None):
+    # Copies src to dest, decompressing or compressing on the way according to both names
+    dest = compressed_name(dest, compression)
+    if compression_of(src) == compression_of(dest):
+        shutil.copyfile(src, dest)
+        return dest
+    with open_file(src, 'rb') as in_file, open_file(dest, 'wb') as out_file:
+        shutil.copyfileobj(in_file, out_file)
+    return dest
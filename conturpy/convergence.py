@@ -0,0 +1,170 @@
+import copy
+import numpy as np
+from .surrogate import throat_location
+
+GRID_LABELS = ("MT", "NT", "MD", "ND", "NF")
+
+
+def scale_grid(settings, scale, labels=GRID_LABELS, min_points=5):
+    # Point counts scaled by scale, kept odd as the card notes ask and signed as in the original (e.g. NF < 0)
+    scaled = copy.deepcopy(settings)
+    for label in labels:
+        count = settings[label]
+        points = max(min_points, int(round(abs(count) * scale)))
+        points += 1 - points % 2
+        scaled[label] = int(np.sign(count)) * points if count != 0 else 0
+    return scaled
+
+
+def richardson(values, spacing):
+    # Observed order and extrapolated value from the three finest levels, values ordered from finest to coarsest.
+    # Values may be arrays (e.g. a contour), in which case the order is taken from their max norm.
+    f1, f2, f3 = [np.asarray(x, dtype=float) for x in values[:3]]
+    r = np.sqrt(spacing[2] / spacing[0])
+    d21 = np.max(np.abs(f2 - f1))
+    d32 = np.max(np.abs(f3 - f2))
+    if d21 == 0:
+        return np.inf, f1
+    if d32 <= d21 or r <= 1:
+        # Not converging monotonically: no order can be observed, so the finest level is the best estimate
+        return None, f1
+    p = np.log(d32 / d21) / np.log(r)
+    r21 = spacing[1] / spacing[0]
+    return p, f1 + (f1 - f2) / (r21 ** p - 1)
+
+
+class ConvergenceLevel(object):
+    def __init__(self, scale, settings):
+        self.scale = scale
+        self.settings = settings
+        self.result = None
+        self.error = None
+        self.run_time = None
+        self.estimated_error = None
+
+    @property
+    def counts(self):
+        return {label: self.settings[label] for label in GRID_LABELS}
+
+    def __repr__(self):
+        counts = ", ".join(f"{label}={value}" for label, value in self.counts.items())
+        return f"ConvergenceLevel (scale {self.scale:g}: {counts})"
+
+
+class ConvergenceStudy(object):
+    def __init__(self, settings, levels=4, ratio=1.5, labels=GRID_LABELS, n_pts=201):
+        # Levels are ordered from finest (the given settings) to coarsest, each ratio times coarser than the last
+        self.labels = labels
+        self.ratio = ratio
+        self.n_pts = n_pts
+        self.levels = [ConvergenceLevel(ratio ** -k, scale_grid(settings, ratio ** -k, labels))
+                       for k in range(levels)]
+        self.metrics = None
+        self.order = None
+        self.extrapolated = None
+
+    def run(self, application, workers=1, refine_amt=21, lean=True):
+        levels = {id(level.settings): level for level in self.levels}
+        for settings, result in application.iter_batch([x.settings for x in self.levels], refine_amt=refine_amt,
+                                                       lean=lean, workers=workers):
+            level = levels[id(settings)]
+            if isinstance(result, Exception):
+                level.error = result
+            else:
+                # Each level's own cost, timed in the worker, so the levels can be compared whatever the pool did
+                level.result = result
+                level.run_time = result.run_time
+
+        failed = [x for x in self.levels if x.result is None]
+        if failed:
+            import warnings
+            warnings.warn(f"Convergence study: {len(failed)} of {len(self.levels)} levels failed "
+                          f"({', '.join(str(x.error) for x in failed)})")
+        return self.analyze()
+
+    def _spacing(self, level):
+        # Grid spacing relative to the finest level, from the mean refinement of the scaled counts
+        base = self.levels[0].counts
+        return np.mean([abs(base[label]) / abs(level.counts[label]) for label in self.labels if base[label] != 0])
+
+    def _metrics(self, levels):
+        throats = [throat_location(x.result) for x in levels]
+        lengths = np.array([x.result.nozzle_length for x in levels])
+
+        # Contours compared from the throat over the length all levels share, in throat radii of the finest level
+        r_throat = throats[0][1]
+        x = np.linspace(0, lengths.min(), self.n_pts)
+        contours = [level.result.evaluate(throat[0] + x) / r_throat for level, throat in zip(levels, throats)]
+        exit_radius = np.array([level.result.evaluate(throat[0] + length) / r_throat
+                                for level, throat, length in zip(levels, throats, lengths)])
+
+        return {'nozzle_length': lengths / lengths[0], 'exit_radius': exit_radius, 'contour': contours}
+
+    def analyze(self):
+        levels = [x for x in self.levels if x.result is not None]
+        if len(levels) < 3:
+            raise Exception(f"Convergence study needs at least 3 completed levels, got {len(levels)}")
+
+        spacing = [self._spacing(x) for x in levels]
+        self.metrics = self._metrics(levels)
+        self.order = {}
+        self.extrapolated = {}
+        for name, values in self.metrics.items():
+            self.order[name], self.extrapolated[name] = richardson(values, spacing)
+
+        # Each level's error is its largest deviation from the extrapolated values: relative for the length, in throat
+        # radii for the exit radius and contour
+        for idx, level in enumerate(levels):
+            level.estimated_error = {name: float(np.max(np.abs(np.asarray(values[idx]) - self.extrapolated[name])))
+                                     for name, values in self.metrics.items()}
+        return self
+
+    def recommend_level(self, tolerance=1e-3):
+        # The coarsest level within tolerance, or the finest level that ran if none is
+        if self.metrics is None:
+            raise Exception("Convergence study has not been run")
+
+        completed = [x for x in self.levels if x.result is not None]
+        if not completed:
+            raise Exception("Convergence study has no completed levels")
+        candidates = [x for x in completed if x.estimated_error is not None and
+                      max(x.estimated_error.values()) <= tolerance]
+        if not candidates:
+            import warnings
+            warnings.warn(f"Convergence study: no level meets tolerance {tolerance:g}, returning the finest completed "
+                          f"level")
+            return max(completed, key=lambda x: x.scale)
+        return min(candidates, key=lambda x: x.scale)
+
+    def recommend(self, tolerance=1e-3):
+        return self.recommend_level(tolerance).settings
+
+    def __repr__(self):
+        lines = [f"ConvergenceStudy ({len(self.levels)} levels, ratio {self.ratio:g}):"]
+        for level in self.levels:
+            counts = " ".join(f"{label}={value:<5d}" for label, value in level.counts.items())
+            if level.estimated_error is None:
+                status = "failed" if level.error is not None else "not run"
+            else:
+                status = " ".join(f"{name}={value:.2e}" for name, value in level.estimated_error.items())
+            lines.append(f"    {counts} {status}")
+        if self.order is not None:
+            orders = ", ".join(f"{name} {'-' if p is None else f'{p:.2f}'}" for name, p in self.order.items())
+            lines.append(f"    observed order: {orders}")
+        return "\n".join(lines)
+
+
+def recommend_refine_amt(r, tolerance=1e-4, candidates=(2, 3, 5, 9, 11, 21, 41, 81)):
+    # Smallest refine_amt whose straight segments stay within tolerance (in throat radii) of the wall spline,
+    # checked at the midpoints of the refined segments. Needs no CONTUR runs.
+    knots, _ = r._wall_spline()
+    r_throat = throat_location(r)[1]
+    for n_pts in candidates:
+        t = np.linspace(0, 1, n_pts)
+        x = (knots[:-1, None] + t[None, :] * np.diff(knots)[:, None]).ravel()
+        y = r.evaluate(x)
+        x_mid = 0.5 * (x[1:] + x[:-1])
+        deviation = np.abs(r.evaluate(x_mid) - 0.5 * (y[1:] + y[:-1])) / r_throat
+        if np.nanmax(deviation) <= tolerance:
+            return n_pts
+    return candidates[-1]
@@ -1,3 +1,4 @@
+import math
 import os
 
 
@@ -42,6 +43,9 @@ class ConturCard(object):
         return "".join([f"{val:{aligns[idx]}{widths[idx]}}" if widths[idx] != -1 else reduce_g(val)
                         for idx, val in enumerate(self.card_values)])
 
+    def width(self, label):
+        return self.card_widths[0] if len(self.card_widths) == 1 else self.card_widths[self.card_labels.index(label)]
+
     def to_dict(self):
         return dict(zip(self.card_labels, self.card_values))
 
@@ -126,7 +130,7 @@ class ConturSettings(object):
                            self._cardC, self._cardD]
         self._str_fields = [card.card_labels for card in self._card_deck]
 
-    def get_deck(self) -> str:
+    def _deck_cards(self):
         card5 = None
         card6 = None
         card7 = None
@@ -143,7 +147,7 @@ class ConturSettings(object):
         # noinspection PyChainedComparisons
         if self._include_bl and self._bl_use_characteristics and self._smooth_inviscid_contour:
             card6 = self._cardB
-        elif (self._card4["JB"] > 0 and self._card4["LV"] <= 0 and not self._smooth_inviscid_contour) or \
+        elif (self._card4["JB"] > 0 and self._cardB["LV"] <= 0 and not self._smooth_inviscid_contour) or \
                 self._smooth_before_spline:
             card6 = self._cardD
 
@@ -152,15 +156,155 @@ class ConturSettings(object):
         elif self._smooth_inviscid_contour and self._include_bl and self._use_spline:
             card7 = self._cardD
 
-        return "".join([
-            self._card1.print() + "\n",
-            self._card2.print() + "\n",
-            self._card3.print() + "\n",
-            self._card4.print() + "\n",
-            card5.print() + "\n" if card5 is not None else "",
-            card6.print() + "\n" if card6 is not None else "",
-            card7.print() + "\n" if card7 is not None else "",
-        ])
+        return [card for card in [self._card1, self._card2, self._card3, self._card4, card5, card6, card7]
+                if card is not None]
+
+    def get_deck(self) -> str:
+        return "".join([card.print() + "\n" for card in self._deck_cards()])
+
+    def _expected_cards(self):
+        # Order in which CONTUR reads the optional cards: A in NEO (smoothing, NF < 0), C in AXIAL for each streamline
+        # pass (JX > 0), B in BOUND (JB > 0) and D in MAIN when the contour is interpolated (XBL = 1000)
+        cards = []
+        if self["NF"] < 0:
+            cards.append(self._cardA)
+        if self["JX"] > 0:
+            cards.append(self._cardC)
+        if self["JB"] > 0:
+            cards.append(self._cardB)
+        if self["XBL"] == 1000:
+            cards.append(self._cardD)
+        return cards
+
+    def _radial_flow_epsi(self):
+        # EPSI from AXIAL (labels 6-10) in degrees: the Prandtl-Meyer angle at F (from FMACH, or from BMACH when FMACH
+        # is 0) less the turn 2 * ETA / QT across the radial flow. None where the values are out of range anyway.
+        gam, eta, bmach, fmach = self["GAM"], math.radians(self["ETAD"]), self["BMACH"], self["FMACH"]
+        if gam <= 1 or eta <= 0 or bmach < 1 or 0 < fmach < 1 or self["JD"] not in (0, -1):
+            return None
+
+        def prandtl_meyer(mach):
+            g2 = math.sqrt((gam + 1) / (gam - 1))
+            beta = math.sqrt(mach ** 2 - 1)
+            return g2 * math.atan(beta / g2) - math.atan(beta)
+
+        if fmach > 0:
+            fpsi = prandtl_meyer(fmach)
+        elif fmach == 0:
+            fpsi = min(prandtl_meyer(bmach), 7.5 * eta)
+        else:
+            fpsi = -fmach * eta
+        qt = 1 / (2 + self["JD"])
+        return math.degrees(fpsi - 2 * eta / qt)
+
+    def _radial_flow_abcm(self):
+        # ABCM from AXIAL (labels 53-58) for the default downstream distribution (0 <= XC < 1): the cubic from BMACH to
+        # CMC has no solution when it is negative ("BMACH IS TOO SMALL TO ALLOW A SOLUTION"), and AXIAL then reads
+        # the following cards as a new card 3. None where it is not computed.
+        gam, bmach, cmc = self["GAM"], self["BMACH"], self["CMC"]
+        cmach = abs(cmc)
+        lc = int(self["XC"] + 1) if self["XC"] > 1 else int(self["XC"])
+        ip = self["IN"]
+        if ip != 0 and (lc == 0 or cmc < 0):
+            ip = int(math.copysign(10, ip))
+        if gam <= 1 or bmach <= 1 or cmach <= bmach or lc != 0 or ip == 0 or self["JD"] not in (0, -1):
+            return None
+
+        qt = 1 / (2 + self["JD"])
+        g8 = (gam - 1) / 2
+        if ip > 0:
+            # Mach number distribution: slope and curvature of the source flow Mach number (CONIC)
+            xmm1 = bmach ** 2 - 1
+            area = ((2 + (gam - 1) * bmach ** 2) / (gam + 1)) ** ((gam + 1) / (2 * (gam - 1))) / bmach
+            b1 = area ** qt
+            slope = bmach * (1 + g8 * bmach ** 2) / qt / xmm1 / b1
+            c2 = 2 - (1 + 3 * g8) / qt
+            c4 = g8 / qt - 1
+            curvature = slope * (bmach ** 2 * (c2 + bmach ** 2 * c4) - 1 - 1 / qt) / xmm1 ** 2 / b1 * ip / 10
+            change = cmach - bmach
+        else:
+            # Velocity distribution (SORCE)
+            al = (gam + 1) / (gam - 1)
+            wb, wc = [math.sqrt(al) * mach / math.sqrt(mach ** 2 + 2 / (gam - 1)) for mach in (bmach, cmach)]
+            ww = wb ** 2
+            b1 = (((al - 1) / (al - ww)) ** (1 / (gam - 1)) / wb) ** qt
+            axw = al * (ww - 1) * b1
+            slope = wb * (al - ww) / axw / qt
+            c2 = 3 / qt + al * (2 - 1 / qt)
+            c4 = al + 1 / qt
+            curvature = slope * (ww * (c2 - ww * c4) - al * (1 + 1 / qt)) / axw / (ww - 1)
+            change = wc - wb
+        if curvature == 0:
+            return None
+        if cmc < 0:
+            return 1 + 1.5 * change * curvature / slope ** 2
+        return 1 + 4 * change * curvature / (3 * slope ** 2)
+
+    def validate(self, raise_error=True):
+        problems = []
+
+        def check(condition, message):
+            if not condition:
+                problems.append(message)
+
+        # Card 1: MAIN ends the run without output when the first four columns of the title are blank
+        check(self._card1.print()[:4].strip() != "", f"ITLE '{self['ITLE']}' leaves columns 1-4 blank once centered, "
+                                                     f"which CONTUR reads as the end of input (use 5+ characters)")
+        check(self["JD"] in (0, -1), f"JD must be 0 (axisymmetric) or -1 (planar), got {self['JD']}")
+
+        # Card 2 and 3: gas and design Mach numbers
+        check(self["GAM"] > 1, f"GAM must be greater than 1, got {self['GAM']}")
+        check(abs(self["CMC"]) > 1, f"|CMC| must be greater than 1, got {self['CMC']}")
+        check(0 < self["ETAD"] <= 60, f"ETAD must be in (0, 60], got {self['ETAD']}")
+        check(self["RC"] >= 0, f"RC must be positive (or 0 to iterate for it), got {self['RC']}")
+        if self["ETAD"] != 60:
+            # AXIAL takes sqrt(BMACH**2 - 1) for every radial flow run
+            check(self["BMACH"] >= 1, f"BMACH must be at least 1 when ETAD is not 60, got {self['BMACH']}")
+            check(self["BMACH"] < abs(self["CMC"]), f"BMACH ({self['BMACH']}) must be below CMC ({self['CMC']})")
+            check(self["FMACH"] <= 0 or self["FMACH"] >= 1, f"FMACH must be 0, negative or at least 1, "
+                                                             f"got {self['FMACH']}")
+            epsi = self._radial_flow_epsi()
+            if epsi is not None:
+                check(epsi > 0, f"Prandtl-Meyer angle at the start of the radial flow (EPSI) is {epsi:.1f} deg: "
+                                f"raise BMACH or FMACH or lower ETAD so that it is positive")
+            abcm = self._radial_flow_abcm()
+            if abcm is not None:
+                check(abcm >= 0, f"BMACH ({self['BMACH']}) is too small for the distribution to CMC "
+                                 f"({self['CMC']}) to have a solution")
+
+        # Card 4: array dimensions in mod_work (characteristics 150, wall 200), mod_cline (axis 150), mod_troat
+        # (throat characteristic 51) and mod_jack (30)
+        check(3 <= self["MT"] <= 150, f"MT must be in [3, 150], got {self['MT']}")
+        check(abs(self["NT"]) <= 150, f"|NT| must be at most 150, got {self['NT']}")
+        check(abs(self["LR"]) <= 51, f"|LR| must be at most 51, got {self['LR']}")
+        check(abs(self["LR"]) + abs(self["NT"]) <= 149, f"|LR| + |NT| must be at most 149, "
+                                                        f"got {abs(self['LR']) + abs(self['NT'])}")
+        check(self["MD"] <= 125, f"MD must be at most 125, got {self['MD']}")
+        check(self["ND"] <= 150, f"ND must be at most 150, got {self['ND']}")
+        check(abs(self["NF"]) <= 150, f"|NF| must be at most 150, got {self['NF']}")
+        check(self["NT"] + abs(self["NF"]) - 1 <= 200, f"NT + |NF| - 1 wall points must be at most 200, "
+                                                       f"got {self['NT'] + abs(self['NF']) - 1}")
+        check(self["IT"] <= 0, f"IT > 0 needs a card of station coordinates that ConturSettings does not write")
+
+        # Card B: stagnation conditions of the boundary layer calculation
+        if self["JB"] > 0:
+            check(self["PPQ"] > 0 and self["TO"] > 0 and self["TWT"] > 0,
+                  "PPQ, TO and TWT must be positive for the boundary layer calculation")
+
+        # Card D: MAIN computes (XEND - XLOW) / XINC + 1 stations
+        if self["XBL"] == 1000 and self["XEND"] > 0:
+            check(self["XINC"] > 0, f"XINC must be positive, got {self['XINC']}")
+            check(self["XEND"] > self["XLOW"], f"XEND ({self['XEND']}) must be greater than XLOW ({self['XLOW']})")
+
+        labels = {id(card): name for card, name in zip([self._cardA, self._cardB, self._cardC, self._cardD], "ABCD")}
+        written = [labels[id(card)] for card in self._deck_cards()[4:]]
+        expected = [labels[id(card)] for card in self._expected_cards()]
+        check(written == expected, f"deck has cards {', '.join(written) or 'none'} after card 4 but CONTUR will "
+                                   f"read {', '.join(expected) or 'none'} (from NF, JX, JB and XBL)")
+
+        if problems and raise_error:
+            raise Exception("Invalid CONTUR settings:\n  " + "\n  ".join(problems))
+        return problems
 
     def print_to_input(self, file_name=None, output_directory=None):
         file_name = 'input.txt' if file_name is None else file_name
@@ -168,6 +312,22 @@ class ConturSettings(object):
         with open(file_path, 'w') as out_file:
             out_file.write(self.get_deck())
 
+    def is_integer(self, label):
+        # Labels the deck writes with an integer format ("5d", "2d"): counts and switches rather than reals
+        is_present = [label in row for row in self._str_fields]
+        if not any(is_present):
+            raise AttributeError(f"Card label {label} not found")
+        width = self._card_deck[is_present.index(True)].width(label)
+        return width != -1 and width.endswith('d')
+
+    def to_dict(self):
+        # Labels that appear on two cards (ETAD) take the value from the first, as in __getitem__
+        values = {}
+        for card in self._card_deck:
+            for label, value in card.to_dict().items():
+                values.setdefault(label, value)
+        return values
+
     def __getitem__(self, label: str):
         is_present = [label in row for row in self._str_fields]
 
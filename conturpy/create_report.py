@@ -1,27 +1,29 @@
 import numpy as np
 import os
 import matplotlib.pyplot as plt
+from .compressed import open_file, compressed_name
 from .plot_results import gen_bl_thickness_plot, gen_bl_temperature_plot, gen_noz_characteristics, \
     gen_throat_characteristics, gen_contours, gen_flow_angles, gen_flow_angles_throat
 
 
-def save_table(table, directory, base_name, section_num, table_num=None):
+def save_table(table, directory, base_name, section_num, table_num=None, compression=None):
     header = ",".join(table.headers)
     table_name_section = "" if table_num is None else f"_{table_num}"
-    filename = f"{base_name}_{section_num}" + table_name_section + ".csv"
-    np.savetxt(os.path.join(directory, filename), table.to_numpy(), delimiter=',', header=header)
+    filename = compressed_name(f"{base_name}_{section_num}" + table_name_section + ".csv", compression)
+    with open_file(os.path.join(directory, filename), 'wt') as out_file:
+        np.savetxt(out_file, table.to_numpy(), delimiter=',', header=header)
 
 
-def save_group(subsection, base_name, directory):
+def save_group(subsection, base_name, directory, compression=None):
     for idx, individual in enumerate(subsection):
         if len(individual.tables) > 1:
             for table_num, table in enumerate(individual.tables):
-                save_table(table, directory, base_name, idx, table_num)
+                save_table(table, directory, base_name, idx, table_num, compression)
         elif len(individual.tables) == 1:
-            save_table(individual.tables[0], directory, base_name, idx)
+            save_table(individual.tables[0], directory, base_name, idx, compression=compression)
 
 
-def save_all(r, directory):
+def save_all(r, directory, compression=None):
     if not os.path.exists(directory):
         os.mkdir(directory)
 
@@ -36,7 +38,7 @@ def save_all(r, directory):
              'CoordinatesAndDerivatives']
     for name in names:
         subsection = [x for x in r.sections if x.class_name.replace('Contur', '') == name]
-        save_group(subsection, name, directory)
+        save_group(subsection, name, directory, compression)
 
     plot_functions = [gen_bl_thickness_plot, gen_bl_temperature_plot, gen_noz_characteristics,
                       gen_throat_characteristics, gen_contours, gen_flow_angles, gen_flow_angles_throat]
@@ -0,0 +1,115 @@
+import os
+
+
+def _unique_names(names):
+    # Parquet readers select columns by name, so repeated headers (e.g. H in the boundary layer table) get a suffix
+    seen = {}
+    unique = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            unique.append(f"{name}_{seen[name]}")
+        else:
+            seen[name] = 0
+            unique.append(name)
+    return unique
+
+
+def _input_values(settings):
+    if settings is None:
+        return {}
+    values = settings.to_dict() if hasattr(settings, 'get_deck') else dict(settings)
+    # Numbers are stored as floats so a label has the same column type in every run of a campaign
+    return {label: float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+            for label, value in values.items()}
+
+
+def iter_named_tables(r):
+    # Names as in save_all: section type, index of the section of that type, and the table index if there are several
+    counts = {}
+    for section in r.sections:
+        name = section.class_name.replace('Contur', '')
+        section_num = counts.get(name, 0)
+        counts[name] = section_num + 1
+        for table_num, table in enumerate(section.tables):
+            suffix = f"_{table_num}" if len(section.tables) > 1 else ""
+            yield f"{name}_{section_num}{suffix}", table
+
+
+def table_to_arrow(table, constants=None):
+    import pyarrow as pa
+
+    n_rows = table.data.shape[0]
+    constants = {} if constants is None else constants
+    names = _unique_names([*constants, *table.headers])
+    columns = [pa.array([value] * n_rows) for value in constants.values()]
+    columns += [pa.array(table.data[:, idx]) for idx in range(table.data.shape[1])]
+    return pa.Table.from_arrays(columns, names=names)
+
+
+def result_to_arrow(r, run_id=None, settings=None):
+    constants = {'run_id': r.title.strip() if run_id is None else run_id, **_input_values(settings)}
+    return {name: table_to_arrow(table, constants) for name, table in iter_named_tables(r)}
+
+
+def results_to_arrow(results, run_ids=None, settings=None):
+    import pyarrow as pa
+
+    grouped = {}
+    for idx, r in enumerate(results):
+        if r is None:
+            continue
+        run_id = idx if run_ids is None else run_ids[idx]
+        for name, table in result_to_arrow(r, run_id, None if settings is None else settings[idx]).items():
+            grouped.setdefault(name, []).append(table)
+
+    # Tables of the same name can differ in columns between runs (e.g. the coordinates), missing ones become null
+    return {name: pa.concat_tables(tables, promote_options='permissive') for name, tables in grouped.items()}
+
+
+def write_parquet(r, directory, run_id=None, settings=None, compression='zstd'):
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(directory):
+        os.mkdir(directory)
+
+    files = []
+    for name, table in result_to_arrow(r, run_id, settings).items():
+        files.append(os.path.join(directory, f"{name}.parquet"))
+        pq.write_table(table, files[-1], compression=compression)
+    return files
+
+
+def write_parquet_dataset(results, directory, run_ids=None, settings=None, runs_per_file=100, compression='zstd'):
+    # One folder per table name, each read back as a single table by pyarrow.dataset or pandas.read_parquet. Results
+    # are consumed one at a time and written every runs_per_file runs, so a generator of results is never held whole.
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(directory):
+        os.mkdir(directory)
+
+    files = []
+
+    def flush(batch_results, batch_ids, batch_settings):
+        part = len(files)
+        for name, table in results_to_arrow(batch_results, batch_ids, batch_settings).items():
+            table_dir = os.path.join(directory, name)
+            if not os.path.exists(table_dir):
+                os.mkdir(table_dir)
+            pq.write_table(table, os.path.join(table_dir, f"part-{part:05d}.parquet"), compression=compression)
+        files.append(part)
+
+    batch = ([], [], [])
+    for idx, r in enumerate(results):
+        if r is None:
+            continue
+        batch[0].append(r)
+        batch[1].append(idx if run_ids is None else run_ids[idx])
+        batch[2].append(None if settings is None else settings[idx])
+        if len(batch[0]) >= runs_per_file:
+            flush(*batch)
+            batch = ([], [], [])
+    if batch[0]:
+        flush(*batch)
+
+    return len(files)
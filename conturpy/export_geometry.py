@@ -0,0 +1,164 @@
+import numpy as np
+
+
+def num_wall_points(r, axial_pts=21):
+    knots, _ = r._wall_spline()
+    return (len(knots) - 1) * (axial_pts - 1) + 1
+
+
+def iter_wall_points(r, axial_pts=21, chunk_size=1024):
+    # Stations as in ConturResult.refine_coordinates, without repeating the shared end point of each interval
+    knots, _ = r._wall_spline()
+    n_intervals = len(knots) - 1
+    per_interval = axial_pts - 1
+    total = n_intervals * per_interval + 1
+
+    for start in range(0, total, chunk_size):
+        idx = np.arange(start, min(start + chunk_size, total))
+        seg = np.minimum(idx // per_interval, n_intervals - 1)
+        t = (idx - seg * per_interval) / per_interval
+
+        x_vals = knots[seg] + t * (knots[seg + 1] - knots[seg])
+        x_vals[-1] = min(x_vals[-1], knots[-1])
+        yield np.column_stack([x_vals, r.evaluate(x_vals)])
+
+
+def _iter_rings(r, axial_pts, circ_pts, chunk_size):
+    # Yields revolved stations in chunks that overlap by one ring so faces can be built per chunk
+    phi = np.linspace(0, 2 * np.pi, circ_pts, endpoint=False)
+    cos_phi = np.cos(phi)
+    sin_phi = np.sin(phi)
+
+    previous = None
+    for pts in iter_wall_points(r, axial_pts, chunk_size):
+        rings = np.empty((pts.shape[0], circ_pts, 3))
+        rings[:, :, 0] = pts[:, 0, None]
+        rings[:, :, 1] = pts[:, 1, None] * cos_phi
+        rings[:, :, 2] = pts[:, 1, None] * sin_phi
+        yield rings, previous
+        previous = rings[-1]
+
+
+def iter_surface_points(r, axial_pts=21, circ_pts=90, chunk_size=1024):
+    for rings, _ in _iter_rings(r, axial_pts, circ_pts, chunk_size):
+        yield rings.reshape(-1, 3)
+
+
+def iter_surface_triangles(r, axial_pts=21, circ_pts=90, chunk_size=1024):
+    for rings, previous in _iter_rings(r, axial_pts, circ_pts, chunk_size):
+        if previous is not None:
+            rings = np.concatenate([previous[None], rings])
+        if rings.shape[0] < 2:
+            continue
+
+        a = rings[:-1]
+        b = np.roll(rings[:-1], -1, axis=1)
+        c = rings[1:]
+        d = np.roll(rings[1:], -1, axis=1)
+
+        triangles = np.empty((a.shape[0], circ_pts, 2, 3, 3))
+        triangles[:, :, 0] = np.stack([a, b, c], axis=2)
+        triangles[:, :, 1] = np.stack([b, d, c], axis=2)
+        yield triangles.reshape(-1, 3, 3)
+
+
+def iter_surface_faces(r, axial_pts=21, circ_pts=90, chunk_size=1024):
+    n_rings = num_wall_points(r, axial_pts)
+
+    for start in range(0, n_rings - 1, chunk_size):
+        ring = np.arange(start, min(start + chunk_size, n_rings - 1))[:, None]
+        col = np.arange(circ_pts)[None, :]
+        col_next = (col + 1) % circ_pts
+
+        a = ring * circ_pts + col
+        b = ring * circ_pts + col_next
+        c = (ring + 1) * circ_pts + col
+        d = (ring + 1) * circ_pts + col_next
+
+        faces = np.empty((ring.shape[0], circ_pts, 2, 3), dtype=np.int64)
+        faces[:, :, 0] = np.stack([a, b, c], axis=2)
+        faces[:, :, 1] = np.stack([b, d, c], axis=2)
+        yield faces.reshape(-1, 3)
+
+
+def _triangle_normals(triangles):
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    return normals / lengths[:, None]
+
+
+def write_points(r, filename, axial_pts=21, circ_pts=1, chunk_size=1024):
+    with open(filename, 'w') as out_file:
+        if circ_pts > 1:
+            out_file.write("# X_IN,Y_IN,Z_IN\n")
+            for pts in iter_surface_points(r, axial_pts, circ_pts, chunk_size):
+                np.savetxt(out_file, pts, delimiter=',')
+        else:
+            out_file.write("# X_IN,Y_IN\n")
+            for pts in iter_wall_points(r, axial_pts, chunk_size):
+                np.savetxt(out_file, pts, delimiter=',')
+
+
+def write_stl(r, filename, axial_pts=21, circ_pts=90, binary=True, chunk_size=1024):
+    n_triangles = 2 * circ_pts * (num_wall_points(r, axial_pts) - 1)
+    name = r.title.strip().replace(' ', '_')
+
+    if binary:
+        stl_dtype = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attr', '<u2')])
+        with open(filename, 'wb') as out_file:
+            out_file.write(f"conturpy {name}".encode('ascii', 'replace')[:80].ljust(80, b' '))
+            out_file.write(np.uint32(n_triangles).tobytes())
+            for triangles in iter_surface_triangles(r, axial_pts, circ_pts, chunk_size):
+                records = np.zeros(triangles.shape[0], dtype=stl_dtype)
+                records['normal'] = _triangle_normals(triangles)
+                records['vertices'] = triangles
+                out_file.write(records.tobytes())
+    else:
+        facet_fmt = "facet normal %e %e %e\n outer loop\n  vertex %e %e %e\n  vertex %e %e %e\n" \
+                    "  vertex %e %e %e\n endloop\nendfacet"
+        with open(filename, 'w') as out_file:
+            out_file.write(f"solid {name}\n")
+            for triangles in iter_surface_triangles(r, axial_pts, circ_pts, chunk_size):
+                rows = np.hstack([_triangle_normals(triangles), triangles.reshape(-1, 9)])
+                np.savetxt(out_file, rows, fmt=facet_fmt)
+            out_file.write(f"endsolid {name}\n")
+
+    return n_triangles
+
+
+def write_ply(r, filename, axial_pts=21, circ_pts=90, binary=True, chunk_size=1024):
+    n_vertices = circ_pts * num_wall_points(r, axial_pts)
+    n_faces = 2 * circ_pts * (num_wall_points(r, axial_pts) - 1)
+
+    header = "".join([
+        "ply\n",
+        "format binary_little_endian 1.0\n" if binary else "format ascii 1.0\n",
+        f"comment conturpy {r.title.strip()}\n",
+        f"element vertex {n_vertices}\n",
+        "property float x\nproperty float y\nproperty float z\n",
+        f"element face {n_faces}\n",
+        "property list uchar int vertex_indices\n",
+        "end_header\n"])
+
+    # Faces index the vertices in the order they are streamed, ring by ring
+    if binary:
+        face_dtype = np.dtype([('count', 'u1'), ('vertex_indices', '<i4', (3,))])
+        with open(filename, 'wb') as out_file:
+            out_file.write(header.encode('ascii', 'replace'))
+            for pts in iter_surface_points(r, axial_pts, circ_pts, chunk_size):
+                out_file.write(pts.astype('<f4').tobytes())
+            for faces in iter_surface_faces(r, axial_pts, circ_pts, chunk_size):
+                records = np.empty(faces.shape[0], dtype=face_dtype)
+                records['count'] = 3
+                records['vertex_indices'] = faces
+                out_file.write(records.tobytes())
+    else:
+        with open(filename, 'w') as out_file:
+            out_file.write(header)
+            for pts in iter_surface_points(r, axial_pts, circ_pts, chunk_size):
+                np.savetxt(out_file, pts, fmt='%e')
+            for faces in iter_surface_faces(r, axial_pts, circ_pts, chunk_size):
+                np.savetxt(out_file, faces, fmt='3 %d %d %d')
+
+    return n_vertices, n_faces
@@ -0,0 +1,232 @@
+import os
+import sys
+import glob
+import shutil
+import tempfile
+import threading
+import subprocess
+import importlib.util
+from pathlib import Path
+
+MODULE_NAME = "_contur"
+
+_src_path = Path(__file__).parent.parent.joinpath('src')
+_bin_path = Path(__file__).parent.joinpath('bin')
+
+# The Fortran keeps all of its state in module variables and I/O units 1 and 2, so calls within one process
+# must never overlap. Separate processes each load their own copy of the extension.
+_lock = threading.Lock()
+_modules = {}
+
+
+def extension_path(directory=None):
+    directory = _bin_path if directory is None else Path(directory)
+    matches = sorted(glob.glob(os.path.join(directory, MODULE_NAME + '.*.so')) +
+                     glob.glob(os.path.join(directory, MODULE_NAME + '.*.pyd')))
+    return Path(matches[0]) if matches else None
+
+
+def is_available():
+    return extension_path() is not None
+
+
+# CONTUR is a program that reads input.txt, writes output.txt and ends with STOP, either normally when AXIAL runs out of
+# cards or when a calculation fails. Inside Python a STOP would end the interpreter, so the extension is built from
+# sources patched to take both file names and to return to MAIN instead, which closes both units at label 24.
+_source_patches = {
+    'main.f': [
+        ("      program contur", "      subroutine contur(infile,outfile)"),
+        ("      implicit none\n!\n      interface",
+         "      implicit none\n      character(len=*),intent(in) :: infile,outfile\n!\n      interface"),
+        ("      it=0\n", "      it=0\n      nocon=0\n"),
+        ("3     call axial\n", "3     call axial\n      if (lv .eq. -2) goto 24\n"),
+        ("file='input.txt'", "file=infile"),
+        ("file='output.txt'", "file=outfile"),
+        ("if (jb .eq. 7) stop", "if (jb .eq. 7) goto 24"),
+        ("24    close(1)\n      close(2)\n      stop", "24    close(1)\n      close(2)\n      return"),
+        ("end program contur", "end subroutine contur")],
+    'axial.f': [
+        ("       write (2,126)\n       stop\n", "       write (2,126)\n       lv=-2\n       return\n"),
+        ("91    stop\n", "91    lv=-2\n      return\n")],
+    'neo.f': [
+        ("use contr, only: itle,jq,iq,n,np,nut\n", "use contr, only: itle,jq,iq,n,np,nut,nocon\n"),
+        ("13    write (2,18)\n      stop\n", "13    write (2,18)\n      nocon=1\n      return\n")],
+    'perfc.f': [
+        ("      call neo\n", "      call neo\n      if (nocon .ne. 0) return\n"),
+        ("      if (nf.lt.0) call neo\n", "      if (nf.lt.0) call neo\n      if (nocon .ne. 0) return\n")]}
+
+
+def _patch_sources(build_dir):
+    for source, patches in _source_patches.items():
+        path = os.path.join(build_dir, source)
+        with open(path, 'r') as in_file:
+            text = in_file.read()
+        for old, new in patches:
+            if old not in text:
+                raise RuntimeError(f"Unable to patch {source} for the f2py build: '{old.strip()}' not found")
+            text = text.replace(old, new)
+        with open(path, 'w') as out_file:
+            out_file.write(text)
+
+
+def build_extension(output_dir=None, src_dir=None, compiler_flags="-O2 -std=legacy", quiet=True):
+    output_dir = _bin_path if output_dir is None else Path(output_dir)
+    src_dir = _src_path if src_dir is None else Path(src_dir)
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        sources = sorted(os.path.basename(x) for x in glob.glob(os.path.join(src_dir, '*.f')))
+        for source in sources:
+            shutil.copyfile(os.path.join(src_dir, source), os.path.join(build_dir, source))
+
+        _patch_sources(build_dir)
+
+        # f2py cannot scan the module files, so everything but the wrapped subroutine is compiled to objects first,
+        # modules before the files that use them
+        modules = ['kinddefine.f', *[x for x in sources if x.startswith('mod_')]]
+        others = [x for x in sources if x not in modules and x != 'main.f']
+        for source in [*modules, *others]:
+            result = subprocess.run(['gfortran', '-c', '-fPIC', *compiler_flags.split(), source],
+                                    cwd=build_dir, capture_output=quiet, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"Compiling {source} failed:\n{result.stderr if quiet else ''}")
+        objects = [x.replace('.f', '.o') for x in [*modules, *others]]
+
+        command = [sys.executable, '-m', 'numpy.f2py', '-c', '-m', MODULE_NAME,
+                   f'--f77flags={compiler_flags}', f'--f90flags={compiler_flags}',
+                   'main.f', *objects, 'only:', 'contur', ':']
+        result = subprocess.run(command, cwd=build_dir, capture_output=quiet, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"f2py build of CONTUR failed:\n{result.stderr if quiet else ''}")
+
+        built = extension_path(build_dir)
+        if built is None:
+            raise RuntimeError("f2py build of CONTUR produced no extension module")
+
+        if not os.path.exists(output_dir):
+            os.mkdir(output_dir)
+        destination = Path(output_dir).joinpath(built.name)
+        shutil.copyfile(built, destination)
+
+    return destination
+
+
+def load_extension(path=None):
+    path = extension_path() if path is None else Path(path)
+    if path is None:
+        raise ImportError(f"CONTUR extension not built: call conturpy.f2py_backend.build_extension() "
+                          f"(expected {MODULE_NAME} in {_bin_path})")
+
+    key = str(path)
+    if key not in _modules:
+        spec = importlib.util.spec_from_file_location(MODULE_NAME, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[key] = module
+    return _modules[key]
+
+
+class _Worker(object):
+    def __init__(self, extension):
+        # A gfortran runtime error (e.g. a bad value in a card read) aborts the process it happens in, which the STOP
+        # patches cannot prevent. Calls are therefore made by one long-lived child process per extension, started
+        # once (not forked from a possibly threaded parent) and sent file names over a pipe. A crash or a timeout
+        # only costs restarting it for the next call.
+        self.extension = str(extension)
+        self.process = None
+
+    def _start(self):
+        self.process = subprocess.Popen([sys.executable, '-c', _SERVE, self.extension],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0,
+                                        cwd=str(Path(__file__).parent.parent))
+        # Loading the extension is not part of any run's timeout: the worker says when it is ready
+        if self.process.stdout.readline().strip() != b'ready':
+            self.stop()
+            raise Exception(f"CONTUR f2py worker failed to load {self.extension}")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def call(self, input_file, output_file, timeout=None):
+        import select
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+        try:
+            self.process.stdin.write(f"{input_file}\t{output_file}\n".encode())
+            ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+            reply = self.process.stdout.readline() if ready else b''
+        except OSError:
+            reply = b''
+        if reply.strip() == b'0':
+            return True
+        # Timed out or died: the child holds the Fortran state of an unfinished run, so it is replaced
+        self.stop()
+        return False
+
+
+_workers = {}
+_SERVE = "import sys; from conturpy.f2py_backend import _serve; _serve(sys.argv[1])"
+
+
+def _serve(extension):
+    # Child side of _Worker: replies 0 (completed) or 1 (raised) per request on the original stdout. Stdout and stderr
+    # themselves go to /dev/null so nothing the Fortran prints can corrupt the replies.
+    module = load_extension(extension)
+    replies = os.fdopen(os.dup(1), 'w')
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    replies.write("ready\n")
+    replies.flush()
+    for line in sys.stdin:
+        input_file, output_file = line.rstrip('\n').split('\t')
+        try:
+            module.contur(input_file, output_file)
+            code = 0
+        except Exception:
+            code = 1
+        replies.write(f"{code}\n")
+        replies.flush()
+
+
+def run_files(input_file, output_file, extension=None, isolate=None, timeout=None):
+    # With isolate (the default on POSIX) the run is made by a long-lived worker process, so a run that crashes the
+    # Fortran runtime, or takes longer than timeout seconds, returns False instead of ending or blocking the
+    # interpreter. Without it the extension runs in this process and timeout does not apply.
+    isolate = os.name == 'posix' if isolate is None else isolate
+    path = extension_path() if extension is None else Path(extension)
+    with _lock:
+        if not isolate:
+            load_extension(path).contur(str(input_file), str(output_file))
+        else:
+            # Keyed by process too: a forked pool worker must not share the pipes of its parent's worker
+            key = (os.getpid(), str(path))
+            if key not in _workers:
+                _workers[key] = _Worker(path)
+            worker = _workers[key]
+            if not worker.call(str(input_file), str(output_file), timeout):
+                if os.path.exists(output_file):
+                    os.remove(output_file)
+                return False
+    return os.path.exists(output_file)
+
+
+def _scratch_dir():
+    # A memory-backed filesystem keeps the deck and output text off disk where one exists
+    return '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
+
+def run_deck(deck, extension=None, isolate=None, timeout=None):
+    with tempfile.TemporaryDirectory(dir=_scratch_dir()) as wd:
+        input_file = os.path.join(wd, 'input.txt')
+        output_file = os.path.join(wd, 'output.txt')
+        with open(input_file, 'w') as out_file:
+            out_file.write(deck)
+        if not run_files(input_file, output_file, extension, isolate, timeout):
+            return None
+        with open(output_file, 'r') as in_file:
+            text = in_file.read()
+    return text if text.strip() else None
+
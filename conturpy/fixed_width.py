@@ -0,0 +1,178 @@
+import re
+import numpy as np
+
+_descriptor = re.compile(r"^(\d*)([ifeadg])(\d+)(?:\.\d+)?$")
+_skip = re.compile(r"^(\d*)x$")
+
+
+def format_slices(fmt):
+    # Column slices of the data fields in one record of a Fortran FORMAT, e.g. '1x,i10,2x,1p6e15.7'. Repeated groups
+    # such as '10(i4,2f11.6/)' describe one record per repetition, so only the first record is used.
+    fmt = fmt.replace(' ', '').lower()
+    group = re.match(r"^\d*\((.*)\)$", fmt)
+    if group:
+        fmt = group.group(1)
+    fmt = fmt.split('/')[0]
+
+    slices = []
+    position = 0
+    for token in [x for x in fmt.split(',') if x]:
+        token = re.sub(r"^-?\d*p", "", token)
+        skip = _skip.match(token)
+        if skip:
+            position += int(skip.group(1) or 1)
+            continue
+        field = _descriptor.match(token)
+        if field is None:
+            raise ValueError(f"Unsupported FORMAT descriptor '{token}' in '{fmt}'")
+        for _ in range(int(field.group(1) or 1)):
+            width = int(field.group(3))
+            slices.append((position, position + width))
+            position += width
+    return slices
+
+
+class TableSchema(object):
+    def __init__(self, formats, headers, min_fields=None, header_format=None):
+        self.formats = formats if isinstance(formats, (list, tuple)) else [formats]
+        self.slices = [format_slices(x) for x in self.formats]
+        self.headers = headers
+        self.min_fields = min_fields
+        self.header_slices = None if header_format is None else format_slices(header_format)
+
+    def match(self, line):
+        text = line.rstrip()
+        for slices in self.slices:
+            n_fields = len([x for x in slices if x[0] < len(text)])
+            min_fields = len(slices) if self.min_fields is None else self.min_fields
+            if n_fields < min_fields or len(text) > slices[n_fields - 1][1]:
+                continue
+            try:
+                return [float(text[start:end]) for start, end in slices[:n_fields]]
+            except ValueError:
+                continue
+        return None
+
+    def read_headers(self, line, n_fields):
+        if self.header_slices is None:
+            return list(self.headers[:n_fields])
+        return [line[start:end].strip() for start, end in self.header_slices[:n_fields]]
+
+
+# Row layouts of each printed table, copied from the FORMAT statements in src/. Header names are those the heuristic
+# parser (identify_tables) produces for the same tables, so both paths give identical ConturTable columns.
+characteristic_table = TableSchema(
+    '1x,i10,2x,1p6e15.7,0p2f14.7',  # perfc.f FORMAT 103
+    ['POINT', 'X', 'Y', 'Mach', 'MACH_ANG__D', 'PSI__D', 'FLOW_ANG__D', 'X_IN', 'Y_IN'])
+
+wall_table = TableSchema(
+    '10(8x,i3,2x,1p6e15.7/)',  # perfc.f FORMAT 85
+    ['POINT', 'X', 'Y', 'Mach', 'FLOW_ANG__D', 'WALTAN', 'SECDIF'])
+
+axial_distribution_table = TableSchema(
+    '1x,i3,2f10.5,f10.6,1p3e14.6,0pf10.6,1p3e14.6',  # axial.f FORMAT 97
+    ['POINT', 'X', 'X_IN', 'Mach', 'DM_over_DX', 'D2M_over_DX2', 'D3M_over_DX3', 'W_Q_over_Astar', 'DW_over_DX',
+     'D2W_over_DX2', 'D3W_over_DX3'])
+
+# perfc.f FORMAT 88 prints the first point without the three C(Y) columns
+upstream_spline_table = TableSchema(
+    '1x,9x,i3,5f13.7,1p3e15.6',  # perfc.f FORMAT 88
+    ['POINT', 'X_over_YO', 'Y_over_YO', 'INT_Y_over_YO', 'PAR_over_YO', 'HYP_over_YO', 'C_Y', 'C_YI', 'C_YP'],
+    min_fields=9)
+upstream_spline_first_point = TableSchema(
+    '1x,9x,i3,5f13.7',  # perfc.f FORMAT 88
+    ['POINT', 'X_over_YO', 'Y_over_YO', 'INT_Y_over_YO', 'PAR_over_YO', 'HYP_over_YO'])
+
+smoothed_contour_table = TableSchema(
+    '1x,20x,i5,2x,0p4f13.7,i8',  # neo.f FORMAT 15
+    ['POINT', 'X', 'Y-CALC', 'Y-IN', 'DIFF', 'POINT1'])
+
+throat_velocity_table = TableSchema(
+    '1x,f14.4,4f14.8',  # trans.f FORMAT 13
+    ['Y_over_YO', 'U_over_Astar', 'V_over_Astar', 'W', 'Mach'])
+
+axial_velocity_table = TableSchema(
+    ['1x,f13.3,1p6e18.7',  # trans.f FORMAT 17
+     '1x,f16.8,1pe15.7,5e18.7'],  # trans.f FORMAT 18
+    ['X_over_Ystar', 'W', 'WP', 'WPP', 'M', 'MP', 'MPP'])
+
+bl_table = TableSchema(
+    '1x,i3,2f6.1,f7.1,f6.1,i9,i7,4f8.5,f8.4,f7.4,2f8.5,f9.6,f7.4,f9.6',  # bound.f FORMAT 83
+    ['Untitled0', 'TW', 'TE', 'TAW', 'TP', 'RE_over_IN', 'RTHI', 'FRD', 'KCF1', 'KCF', 'RCFS', 'H', 'HI', 'FMY',
+     'KTHP', 'THETA_1', 'DELTA', 'DELTAstar__1'])
+
+bl_station_table = TableSchema(
+    '10(i4,0p2f11.6,2f11.7,4f10.7,f11.7,f10.7,1p2e12.4/)',  # bound.f FORMAT 69
+    ['Untitled0', 'STA_IN', 'Y_IN', 'DELR_IN', 'R_IN', 'DY_over_DX', 'D2Y_over_DX2', 'DA_over_DX', 'DR_over_DX',
+     'MACH_NO', '_____DM_over_DX', 'PE_over_PO', 'BETA'])
+
+# main.f FORMAT 31 labels each column with an A4 or A8 field (the A4 labels are followed by '(IN)'), so the headers
+# are read from the header line at those positions
+coordinates_table = TableSchema(
+    ['1x,8x,2f15.6,1p4e20.8',  # main.f FORMAT 26
+     '10(9x,0p2f15.6,1pe20.8/)'],  # main.f FORMAT 27
+    None, min_fields=3,
+    header_format='1x,14x,a8,7x,a8,6x,a8,12x,a8,14x,a8,9x,a8,2x,a4')
+
+section_schemas = {
+    'NOZZLE CONTOUR': [],
+    'UPSTREAM CONTOUR': [smoothed_contour_table],
+    'INTERMEDIATE RIGHT CHARACTERISTIC': [characteristic_table],
+    'INTERMEDIATE LEFT CHARACTERISTIC': [characteristic_table],
+    'BOUNDARY LAYER CALCULATIONS': [bl_table, bl_station_table],
+    'INVISCID CONTOUR': [characteristic_table, wall_table, axial_distribution_table, upstream_spline_table,
+                         upstream_spline_first_point],
+    'THROAT VELOCITY DISTRIBUTION': [throat_velocity_table, axial_velocity_table],
+    'THROAT CHARACTERISTIC': [characteristic_table],
+    'COORDINATES AND DERIVATIVES': [coordinates_table]}
+
+
+def _looks_numeric(line):
+    fields = line.split()
+    if not fields:
+        return False
+    try:
+        float(fields[0])
+        return True
+    except ValueError:
+        return False
+
+
+def decode_tables(lines, schemas):
+    # Same result as identify_tables: a list of (header, data) and the table number of every line (0 if none).
+    # Returns None when a numeric line fits none of the schemas so the caller can fall back to identify_tables.
+    table_idx = np.zeros((len(lines),))
+    rows = []
+    table_keys = []
+    current_key = None
+
+    for idx, line in enumerate(lines):
+        if idx == 0 or not line.strip():
+            continue
+
+        values = None
+        for schema in schemas:
+            values = schema.match(line)
+            if values is not None:
+                break
+
+        if values is None:
+            if _looks_numeric(line):
+                return None
+            continue
+
+        key = (id(schema), len(values))
+        if key != current_key:
+            table_keys.append((schema, len(values), idx))
+            rows.append([])
+            current_key = key
+        rows[-1].append(values)
+        table_idx[idx] = len(table_keys)
+
+    tables = []
+    for (schema, n_fields, start_idx), table_rows in zip(table_keys, rows):
+        data = np.empty((len(table_rows), n_fields))
+        data[:] = table_rows
+        header = schema.read_headers(lines[start_idx - 2], n_fields) if start_idx > 1 else None
+        tables.append((header, data))
+    return tables, table_idx
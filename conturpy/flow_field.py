@@ -0,0 +1,95 @@
+import numpy as np
+from scipy.spatial import Delaunay, cKDTree
+
+FIELDS = ('Mach', 'FLOW_ANG__D', 'MACH_ANG__D')
+
+
+def characteristic_points(r, uniform_exit=True):
+    # Positions (inches) and values of every point printed on the throat and intermediate characteristics. Points
+    # shared by crossing characteristics are kept once. CONTUR prints no points in the uniform flow downstream of the
+    # last characteristic, so with uniform_exit a point at the design Mach number is added on the axis at its end.
+    tables = [x.tables[0] for x in r.characteristics if len(x.tables) > 0 and 'X_IN' in x.tables[0].headers]
+    if not tables:
+        raise Exception("No characteristics were read from the CONTUR output")
+    points = np.vstack([np.column_stack([x.X_IN, x.Y_IN]) for x in tables])
+    values = np.vstack([np.column_stack([getattr(x, name) for name in FIELDS]) for x in tables])
+    if uniform_exit and getattr(r, 'design_mach', None):
+        x_exit = points[:, 0].max()
+        points = np.vstack([points, [x_exit, 0]])
+        values = np.vstack([values, [r.design_mach, 0, np.degrees(np.arcsin(1 / r.design_mach))]])
+    _, keep = np.unique(points.round(7), axis=0, return_index=True)
+    return points[keep], values[keep]
+
+
+def isentropic_ratios(mach, gamma=1.4):
+    temperature = 1 / (1 + .5 * (gamma - 1) * mach ** 2)
+    return {'T_over_T0': temperature,
+            'P_over_P0': temperature ** (gamma / (gamma - 1)),
+            'RHO_over_RHO0': temperature ** (1 / (gamma - 1))}
+
+
+class ConturFlowField(object):
+    def __init__(self, r, gamma=1.4, clip_to_wall=True, uniform_exit=True):
+        # The characteristic net is triangulated once; queries locate their triangles with the triangulation's own
+        # search structure, so sampling costs no re-parsing and grows linearly with the number of points. The net is
+        # inviscid: points between it and the (boundary layer corrected) wall are nan.
+        self.gamma = gamma
+        self.points, self.values = characteristic_points(r, uniform_exit)
+        self.triangulation = Delaunay(self.points)
+        self._tree = None
+        self._wall = r.evaluate if clip_to_wall else None
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = cKDTree(self.points)
+        return self._tree
+
+    def _outside(self, x, y, simplex):
+        # Outside the net, or between the net's hull and the wall where the wall curves inward near the throat
+        outside = simplex < 0
+        if self._wall is not None:
+            with np.errstate(invalid='ignore'):
+                outside |= y > self._wall(x)
+        return outside
+
+    def sample(self, x, y, method='linear'):
+        # Values at (x, y) in inches, any matching shapes. Points outside the flow are nan.
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        shape = x.shape
+        query = np.column_stack([x.ravel(), y.ravel()])
+        simplex = self.triangulation.find_simplex(query)
+
+        if method == 'linear':
+            transform = self.triangulation.transform[simplex]
+            weights = np.einsum('ijk,ik->ij', transform[:, :2], query - transform[:, 2])
+            weights = np.column_stack([weights, 1 - weights.sum(axis=1)])
+            vertices = self.triangulation.simplices[simplex]
+            values = np.einsum('ij,ijk->ik', weights, self.values[vertices])
+        elif method == 'nearest':
+            values = self.values[self.tree.query(query)[1]]
+        else:
+            raise ValueError(f"method must be 'linear' or 'nearest', not {method}")
+
+        values[self._outside(query[:, 0], query[:, 1], simplex)] = np.nan
+        samples = {name: values[:, idx].reshape(shape) for idx, name in enumerate(FIELDS)}
+        samples.update(isentropic_ratios(samples['Mach'], self.gamma))
+        return samples
+
+    def mach(self, x, y, method='linear'):
+        return self.sample(x, y, method)['Mach']
+
+    def flow_angle(self, x, y, method='linear'):
+        return self.sample(x, y, method)['FLOW_ANG__D']
+
+    def pressure_ratio(self, x, y, method='linear'):
+        return self.sample(x, y, method)['P_over_P0']
+
+    def temperature_ratio(self, x, y, method='linear'):
+        return self.sample(x, y, method)['T_over_T0']
+
+    def __repr__(self):
+        x_min, y_min = self.points.min(axis=0)
+        x_max, y_max = self.points.max(axis=0)
+        return f"ConturFlowField ({len(self.points)} points, {len(self.triangulation.simplices)} triangles, " \
+               f"X {x_min:.4g} to {x_max:.4g}, Y {y_min:.4g} to {y_max:.4g})"
@@ -0,0 +1,176 @@
+import numpy as np
+from scipy.optimize import brentq
+from .surrogate import throat_location, bl_thickness
+
+METRICS = {}
+
+# Gauss-Legendre nodes and weights on [0, 1]: 5 points integrate the cubic wall's volume (degree 6) exactly
+_nodes, _weights = np.polynomial.legendre.leggauss(5)
+_nodes = (_nodes + 1) / 2
+_weights = _weights / 2
+
+
+def register_metric(name):
+    # Decorator adding func(r, gamma) to the metrics computed by result_metrics and batch_metrics
+    def register(func):
+        METRICS[name] = func
+        return func
+    return register
+
+
+def _cached(r, key, func):
+    # Values are kept on the result itself, so each is computed once however many times it is asked for
+    cache = r.__dict__.setdefault('_metric_cache', {})
+    if key not in cache:
+        cache[key] = func()
+    return cache[key]
+
+
+def _exit_x(r):
+    return _cached(r, '_exit_x', lambda: throat_location(r)[0] + r.nozzle_length)
+
+
+def _wall_quadrature(r):
+    # Quadrature points, weights, radius and slope over the wall, from the first coordinate to the exit
+    def compute():
+        knots, _ = r._wall_spline()
+        x_exit = _exit_x(r)
+        breaks = np.hstack([knots[knots < x_exit], min(x_exit, knots[-1])])
+        h = np.diff(breaks)
+        x = (breaks[:-1, None] + _nodes[None, :] * h[:, None]).ravel()
+        w = (_weights[None, :] * h[:, None]).ravel()
+        return x, w, r.evaluate(x), r.evaluate(x, derivative=1)
+    return _cached(r, '_wall_quadrature', compute)
+
+
+def _displacement(r):
+    return _cached(r, '_displacement', lambda: bl_thickness(r, 'DELTAstar__1'))
+
+
+def mach_from_area_ratio(area_ratio, gamma=1.4):
+    # Supersonic solution of the isentropic area-Mach relation
+    if not area_ratio > 1:
+        return np.nan
+
+    def residual(mach):
+        return ((2 / (gamma + 1)) * (1 + .5 * (gamma - 1) * mach ** 2)) ** ((gamma + 1) / (2 * (gamma - 1))) / mach \
+            - area_ratio
+    return brentq(residual, 1, 100)
+
+
+@register_metric('throat_x')
+def _throat_x(r, gamma):
+    return throat_location(r)[0]
+
+
+@register_metric('throat_radius')
+def _throat_radius(r, gamma):
+    return throat_location(r)[1]
+
+
+@register_metric('exit_radius')
+def _exit_radius(r, gamma):
+    return float(r.evaluate(_exit_x(r)))
+
+
+@register_metric('nozzle_length')
+def _nozzle_length(r, gamma):
+    return r.nozzle_length
+
+
+@register_metric('area_ratio')
+def _area_ratio(r, gamma):
+    # A planar nozzle's area grows with its half-height, an axisymmetric one's with the square of its radius
+    ratio = _exit_radius(r, gamma) / _throat_radius(r, gamma)
+    return ratio if r.planar else ratio ** 2
+
+
+@register_metric('wall_length')
+def _wall_length(r, gamma):
+    _, w, _, slope = _wall_quadrature(r)
+    return np.sum(w * np.sqrt(1 + slope ** 2))
+
+
+@register_metric('surface_area')
+def _surface_area(r, gamma):
+    _, w, y, slope = _wall_quadrature(r)
+    return 2 * np.pi * np.sum(w * y * np.sqrt(1 + slope ** 2))
+
+
+@register_metric('volume')
+def _volume(r, gamma):
+    _, w, y, _ = _wall_quadrature(r)
+    return np.pi * np.sum(w * y ** 2)
+
+
+@register_metric('max_wall_angle')
+def _max_wall_angle(r, gamma):
+    # Degrees, found on the wall's interpolated points
+    knots, _ = r._wall_spline()
+    x = np.linspace(knots[0], min(_exit_x(r), knots[-1]), 20 * len(knots))
+    return np.degrees(np.arctan(np.nanmax(r.evaluate(x, derivative=1))))
+
+
+@register_metric('exit_delta_star')
+def _exit_delta_star(r, gamma):
+    bl = _displacement(r)
+    if bl is None:
+        return np.nan
+    return float(np.interp(_exit_x(r), bl[0], bl[1]))
+
+
+@register_metric('displacement_integral')
+def _displacement_integral(r, gamma):
+    # Displacement thickness integrated along the axis over the boundary layer stations, in square inches
+    bl = _displacement(r)
+    if bl is None:
+        return np.nan
+    return np.sum(.5 * (bl[1][1:] + bl[1][:-1]) * np.diff(bl[0]))
+
+
+@register_metric('exit_mach')
+def _exit_mach(r, gamma):
+    return mach_from_area_ratio(_area_ratio(r, gamma), gamma)
+
+
+@register_metric('exit_mach_displaced')
+def _exit_mach_displaced(r, gamma):
+    # Mach number for the area ratio of the inviscid core, with the displacement thickness taken off the exit and
+    # throat radii
+    bl = _displacement(r)
+    if bl is None:
+        return np.nan
+    x_throat, r_throat = throat_location(r)
+    throat = r_throat - np.interp(x_throat, bl[0], bl[1])
+    core = _exit_radius(r, gamma) - _exit_delta_star(r, gamma)
+    ratio = core / throat
+    return mach_from_area_ratio(ratio if r.planar else ratio ** 2, gamma)
+
+
+def result_metrics(r, names=None, gamma=1.4):
+    names = list(METRICS) if names is None else names
+    metrics = {}
+    for name in names:
+        if name not in METRICS:
+            raise Exception(f"Unknown metric {name} (registered: {', '.join(METRICS)})")
+        metrics[name] = _cached(r, (name, gamma), lambda: float(METRICS[name](r, gamma)))
+    return metrics
+
+
+def batch_metrics(results, names=None, gamma=1.4):
+    # One array per metric over the results. Failed runs (None) and metrics that raise give nan.
+    names = list(METRICS) if names is None else names
+    unknown = [name for name in names if name not in METRICS]
+    if unknown:
+        raise Exception(f"Unknown metrics {', '.join(unknown)} (registered: {', '.join(METRICS)})")
+    values = {name: np.full(len(results), np.nan) for name in names}
+    for idx, r in enumerate(results):
+        if r is None:
+            continue
+        for name in names:
+            try:
+                values[name][idx] = result_metrics(r, [name], gamma)[name]
+            except Exception as err:
+                import warnings
+                warnings.warn(f"Metric {name} failed for result {idx} ({err})")
+    return values
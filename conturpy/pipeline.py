@@ -0,0 +1,182 @@
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from .read_output import ConturResult
+from .shared_results import call_shared, from_shared
+from .compressed import write_text
+
+_DONE = object()
+
+
+class _Job(object):
+    def __init__(self, idx, item, name):
+        self.idx = idx
+        self.item = item
+        self.name = name
+        self.value = None
+
+
+def _get(in_queue, stop):
+    while not stop.is_set():
+        try:
+            return in_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _put(out_queue, obj, stop):
+    while not stop.is_set():
+        try:
+            out_queue.put(obj, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class _Stage(object):
+    # A pool of threads moving jobs from in_queue to out_queue through func. Jobs that already failed pass straight
+    # through. The last thread to see the end of the input passes it on, so each stage drains before the next stops.
+    def __init__(self, func, threads, in_queue, out_queue, stop):
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stop = stop
+        self._remaining = threads
+        self._lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(threads)]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def _work(self):
+        while True:
+            job = _get(self.in_queue, self.stop)
+            if job is None:
+                return
+            if job is _DONE:
+                _put(self.in_queue, _DONE, self.stop)
+                break
+            if not isinstance(job.value, Exception):
+                try:
+                    job.value = self.func(job)
+                except Exception as err:
+                    job.value = err
+            if not _put(self.out_queue, job, self.stop):
+                return
+
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last:
+            _put(self.out_queue, _DONE, self.stop)
+
+
+def _parse_text(text, refine_amt=21, lean=False):
+    return ConturResult.from_text(text, refine_amt=refine_amt, lean=lean)
+
+
+def _report_result(r, directory, compression=None):
+    from .create_report import save_all
+    save_all(r, directory, compression)
+    return directory
+
+
+def iter_pipeline(application, inputs, output_dir=None, report_dir=None, refine_amt=21, lean=False, run_workers=2,
+                  parse_workers=1, report_workers=1, queue_size=4, validate=True, transport='pickle',
+                  compression=None):
+    # Deck generation -> CONTUR -> parsing -> save_all, each stage with its own pool and joined by queues of at most
+    # queue_size jobs, so parsing and reporting of finished runs overlap with the runs still going. CONTUR runs are
+    # subprocesses waited on by run_workers threads; parsing and reporting use process pools of parse_workers and
+    # report_workers (0 parses or reports in a single thread of this process instead). Yields (input, ConturResult or
+    # the exception of a failed job) in order of completion, like iter_batch. Saved outputs and report CSVs are
+    # compressed with compression ('gz', 'xz' or 'zst') if given.
+    if transport not in ('pickle', 'shared_memory'):
+        raise Exception(f"Transport {transport} is not supported")
+    if run_workers < 1:
+        raise Exception("The pipeline needs at least one run worker")
+
+    stop = threading.Event()
+    n_stages = 3 if report_dir is None else 4
+    queues = [queue.Queue(queue_size) for _ in range(n_stages)]
+    executors = []
+    errors = []
+
+    def generate():
+        try:
+            for idx, item in enumerate(inputs):
+                job = _Job(idx, item, application._run_name(item, idx))
+                job.value = application._preflight(item) if validate else None
+                if job.value is None:
+                    try:
+                        if hasattr(item, 'get_deck'):
+                            job.value = item.get_deck()
+                        else:
+                            with open(item, 'r') as in_file:
+                                job.value = in_file.read()
+                    except Exception as err:
+                        job.value = err
+                if not _put(queues[0], job, stop):
+                    return
+        except Exception as err:
+            errors.append(err)
+        _put(queues[0], _DONE, stop)
+
+    def run(job):
+        text = application.run_deck(job.value)
+        if text is None:
+            raise Exception("CONTUR produced no output (timeout or abnormal termination)")
+        if output_dir is not None:
+            write_text(os.path.join(output_dir, f"{job.name}_result.txt"), text, compression)
+        return text
+
+    def in_pool(workers, func, shared=False):
+        if workers == 0:
+            return func
+        executor = ProcessPoolExecutor(workers)
+        executors.append(executor)
+        # Worker processes are started now, before the stage threads: forking while another thread holds a lock (e.g.
+        # the import lock) can leave the child waiting on it forever
+        executor.submit(int).result()
+        if shared:
+            return lambda *args: from_shared(executor.submit(call_shared, func, *args).result())
+        return lambda *args: executor.submit(func, *args).result()
+
+    parse = in_pool(parse_workers, _parse_text, transport == 'shared_memory')
+    stages = [_Stage(run, run_workers, queues[0], queues[1], stop),
+              _Stage(lambda job: parse(job.value, refine_amt, lean), max(parse_workers, 1), queues[1], queues[2],
+                     stop)]
+    if report_dir is not None:
+        if not os.path.exists(report_dir):
+            os.mkdir(report_dir)
+        report = in_pool(report_workers, _report_result)
+
+        def report_job(job):
+            try:
+                report(job.value, os.path.join(report_dir, job.name), compression)
+            except Exception as err:
+                import warnings
+                warnings.warn(f"Pipeline: report for {job.name} failed ({err})")
+            return job.value
+
+        stages.append(_Stage(report_job, max(report_workers, 1), queues[2], queues[3], stop))
+
+    feeder = threading.Thread(target=generate, daemon=True)
+    try:
+        feeder.start()
+        for stage in stages:
+            stage.start()
+        while True:
+            job = queues[-1].get()
+            if job is _DONE:
+                break
+            yield job.item, job.value
+        if errors:
+            raise errors[0]
+    finally:
+        stop.set()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -49,7 +49,7 @@ def gen_bl_thickness_plot(r):
     ax.set_title('Boundary Layer Thickness')
 
     ax.set_xlim([noz_x.min(), noz_x.max()])
-    noz_y_rng = noz_y.ptp()
+    noz_y_rng = np.ptp(noz_y)
     ax.set_ylim([0 - .1 * noz_y_rng, noz_y.max() + .2 * noz_y_rng])
 
     return f, ax
@@ -62,7 +62,9 @@ def prepare_bl_plot(r):
     bl_cor = [x for x in r.bl_calculations if 'STA_IN' in x.tables[0].headers][0].tables[0]
 
     bl_x = bl_cor.STA_IN
-    plot_msk = noz_geom[:, 0] <= r.nozzle_length
+    # nozzle_length is measured from the throat, not from x = 0
+    from .surrogate import throat_location
+    plot_msk = noz_geom[:, 0] <= throat_location(r)[0] + r.nozzle_length
     noz_x = noz_geom[plot_msk, 0]
     noz_y = noz_geom[plot_msk, 1]
 
@@ -85,7 +87,7 @@ def gen_bl_temperature_plot(r):
     ax.add_collection(surf_temp_l)
 
     ax.set_xlim([noz_x.min(), noz_x.max()])
-    noz_y_rng = noz_y.ptp()
+    noz_y_rng = np.ptp(noz_y)
     ax.set_ylim([0 - .1 * noz_y_rng, noz_y.max() + .2 * noz_y_rng])
 
     cbar = plt.colorbar(surf_temp_l)
@@ -111,7 +113,7 @@ def gen_noz_characteristics(r):
     ax.plot(noz_x, subtract_bl(bl_x, bl_res.DELTAstar__1, noz_x, noz_y), ls='--', c='k', label='Delta Star')
     ax.plot(noz_x, noz_y, ls='-', c='k', label='Wall')
     ax.set_xlim([noz_x.min(), noz_x.max()])
-    noz_y_rng = noz_y.ptp()
+    noz_y_rng = np.ptp(noz_y)
     ax.set_ylim([0 - .1 * noz_y_rng, noz_y.max() + .2 * noz_y_rng])
     ax.legend()
     cbar = plt.colorbar(lc)
@@ -155,7 +157,7 @@ def gen_contours(r):
     ax.plot(noz_x, subtract_bl(bl_x, bl_res.DELTAstar__1, noz_x, noz_y), ls='--', c='k', label='Delta Star')
     ax.plot(noz_x, noz_y, ls='-', c='k', label='Wall')
     ax.set_xlim([noz_x.min(), noz_x.max()])
-    noz_y_rng = noz_y.ptp()
+    noz_y_rng = np.ptp(noz_y)
     ax.set_ylim([0 - .1 * noz_y_rng, noz_y.max() + .2 * noz_y_rng])
     ax.legend()
     cbar = plt.colorbar(lc)
@@ -181,7 +183,7 @@ def gen_flow_angles(r, width=.0015, scale=80):
     ax.plot(noz_x, subtract_bl(bl_x, bl_res.DELTAstar__1, noz_x, noz_y), ls='--', c='k', label='Delta Star')
     ax.plot(noz_x, noz_y, ls='-', c='k', label='Wall')
     ax.set_xlim([noz_x.min(), noz_x.max()])
-    noz_y_rng = noz_y.ptp()
+    noz_y_rng = np.ptp(noz_y)
     ax.set_ylim([0 - .1 * noz_y_rng, noz_y.max() + .2 * noz_y_rng])
 
     ax.set_title('Flow Angles')
@@ -203,3 +205,150 @@ def gen_flow_angles_throat(r, width=.0025, scale=25):
     ax.set_title('Throat Flow Angles')
 
     return f, ax
+
+
+def _sweep_values(results, values):
+    # Runs that failed (None) are left out along with their value
+    values = np.arange(len(results), dtype=float) if values is None else np.asarray(values, dtype=float)
+    keep = [idx for idx, r in enumerate(results) if r is not None]
+    return [results[idx] for idx in keep], values[keep]
+
+
+def _sweep_scale(r, normalize):
+    # Axial origin and length scale of a run: its throat and throat radius when normalized, inches otherwise
+    if not normalize:
+        return 0., 1.
+    from .surrogate import throat_location
+    return throat_location(r)
+
+
+def _sweep_wall(r, normalize, n_pts=21):
+    # The same cubics as refine_coordinates, evaluated for all intervals at once
+    knots, _ = r._wall_spline()
+    t = np.linspace(0, 1, n_pts)
+    x = (knots[:-1, None] + t[None, :] * np.diff(knots)[:, None]).ravel()
+    from .surrogate import throat_location
+    x = x[x <= throat_location(r)[0] + r.nozzle_length]
+    x0, scale = _sweep_scale(r, normalize)
+    return (x - x0) / scale, r.evaluate(x) / scale
+
+
+def _sweep_collection(lines, values, norm, cmap, **kwargs):
+    # One collection for every run of a layer: matplotlib draws it in a single call, however many runs there are
+    lc = mplt.collections.LineCollection([np.column_stack(line) for line in lines], norm=norm, cmap=cmap, **kwargs)
+    lc.set_array(np.asarray(values))
+    return lc
+
+
+def _finish_sweep_plot(f, ax, collections, lines, label, normalize, title):
+    for lc in collections:
+        ax.add_collection(lc)
+
+    x = np.hstack([line[0] for line in lines])
+    y = np.hstack([line[1] for line in lines])
+    y_rng = np.nanmax(y) - np.nanmin(y)
+    ax.set_xlim([np.nanmin(x), np.nanmax(x)])
+    ax.set_ylim([min(0, np.nanmin(y)) - .1 * y_rng, np.nanmax(y) + .2 * y_rng])
+    if normalize:
+        ax.set_xlabel('(X - X*) / R*')
+        ax.set_ylabel('Y / R*')
+
+    cbar = plt.colorbar(collections[0], ax=ax)
+    cbar.set_label('Run' if label is None else label)
+    ax.set_title(title)
+    return f, ax
+
+
+def gen_sweep_contours(results, values=None, label=None, normalize=False, cmap='viridis', delta_star=True):
+    # Wall contours of many runs, colored by values (e.g. the RC of each run), with the displacement-corrected contour
+    # dashed
+    from .surrogate import bl_thickness
+    results, values = _sweep_values(results, values)
+    norm = mplt.colors.Normalize(vmin=values.min(), vmax=values.max())
+    f, ax = get_noz_plot()
+
+    walls = [_sweep_wall(r, normalize) for r in results]
+    collections = [_sweep_collection(walls, values, norm, cmap, linewidths=.8, label='Wall')]
+    if delta_star:
+        corrected = []
+        corrected_values = []
+        for r, wall, value in zip(results, walls, values):
+            bl = bl_thickness(r, 'DELTAstar__1')
+            if bl is None:
+                continue
+            x0, scale = _sweep_scale(r, normalize)
+            corrected.append((wall[0], wall[1] - np.interp(wall[0], (bl[0] - x0) / scale, bl[1] / scale,
+                                                           left=np.nan, right=np.nan)))
+            corrected_values.append(value)
+        if corrected:
+            collections.append(_sweep_collection(corrected, corrected_values, norm, cmap, linewidths=.5,
+                                                 linestyles='--', label='Delta Star'))
+
+    f, ax = _finish_sweep_plot(f, ax, collections, walls, label, normalize, f'Contours ({len(results)} runs)')
+    ax.legend(handles=[mplt.lines.Line2D([], [], c='k', ls=lc.get_linestyle()[0], label=lc.get_label())
+                       for lc in collections])
+    return f, ax
+
+
+def gen_sweep_bl_thickness_plot(results, values=None, label=None, normalize=False, cmap='viridis',
+                                columns=('DELTA', 'DELTAstar__1', 'THETA_1')):
+    # Boundary layer thicknesses of many runs along the wall, one collection (and line style) per thickness
+    from .surrogate import bl_thickness
+    results, values = _sweep_values(results, values)
+    norm = mplt.colors.Normalize(vmin=values.min(), vmax=values.max())
+    f, ax = get_noz_plot()
+
+    names = {'DELTA': 'Delta', 'DELTAstar__1': 'Delta Star', 'THETA_1': 'Theta'}
+    styles = ['-', '--', ':', '-.']
+    collections = []
+    all_lines = []
+    for column, style in zip(columns, styles):
+        lines = []
+        line_values = []
+        for r, value in zip(results, values):
+            bl = bl_thickness(r, column)
+            if bl is None:
+                continue
+            x0, scale = _sweep_scale(r, normalize)
+            lines.append(((bl[0] - x0) / scale, bl[1] / scale))
+            line_values.append(value)
+        if lines:
+            collections.append(_sweep_collection(lines, line_values, norm, cmap, linewidths=.8, linestyles=style,
+                                                 label=names.get(column, column)))
+            all_lines += lines
+    if not collections:
+        raise Exception("None of the results has boundary layer calculations")
+
+    f, ax = _finish_sweep_plot(f, ax, collections, all_lines, label, normalize,
+                               f'Boundary Layer Thickness ({len(results)} runs)')
+    if normalize:
+        ax.set_ylabel('Thickness / R*')
+    else:
+        ax.set_ylabel('Thickness [Inches]')
+    ax.legend(handles=[mplt.lines.Line2D([], [], c='k', ls=style, label=lc.get_label())
+                       for lc, style in zip(collections, styles)])
+    return f, ax
+
+
+def gen_sweep_noz_characteristics(results, values=None, label=None, normalize=False, cmap='viridis', linewidth=.3):
+    # Characteristic nets of many runs overlaid, each run's lines and wall colored by its value
+    results, values = _sweep_values(results, values)
+    norm = mplt.colors.Normalize(vmin=values.min(), vmax=values.max())
+    f, ax = get_noz_plot()
+
+    characteristics = []
+    characteristic_values = []
+    for r, value in zip(results, values):
+        x0, scale = _sweep_scale(r, normalize)
+        for char in r.characteristics:
+            if len(char.tables) == 0 or 'X_IN' not in char.tables[0].headers:
+                continue
+            char_tab = char.tables[0]
+            characteristics.append(((char_tab.X_IN - x0) / scale, char_tab.Y_IN / scale))
+            characteristic_values.append(value)
+
+    walls = [_sweep_wall(r, normalize) for r in results]
+    collections = [_sweep_collection(walls, values, norm, cmap, linewidths=1., label='Wall'),
+                   _sweep_collection(characteristics, characteristic_values, norm, cmap, linewidths=linewidth,
+                                     alpha=.5, label='Characteristics')]
+    return _finish_sweep_plot(f, ax, collections, walls, label, normalize, f'Characteristics ({len(results)} runs)')
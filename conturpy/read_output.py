@@ -1,5 +1,6 @@
 import numpy as np
-from .create_report import save_all
+from .fixed_width import section_schemas, decode_tables
+from .compressed import open_file
 
 
 def read_param(line, find_str, ntype=float):
@@ -157,8 +158,11 @@ def identify_tables(lines):
 
 
 class ConturTable(object):
+    __slots__ = ('data', 'headers', '_columns')
+
     def __init__(self, data, headers=None):
         self.data = data
+        self._columns = {}
 
         if headers is not None:
             if len(self.data) == 0:
@@ -174,7 +178,17 @@ class ConturTable(object):
                 self.headers = self.clean_headers(headers)
 
             for idx, header in enumerate(self.headers):
-                setattr(self, header, self.data[:, idx])
+                self._columns[header] = idx
+
+    def __getattr__(self, name):
+        # Columns are looked up by their cleaned header name, e.g. table.X_IN
+        try:
+            columns = object.__getattribute__(self, '_columns')
+        except AttributeError:
+            raise AttributeError(name)
+        if name in columns:
+            return self.data[:, columns[name]]
+        raise AttributeError(f"'ConturTable' has no column '{name}'")
 
     def __repr__(self):
         row_min = [max(12, len(header) + 2) for header in self.headers]
@@ -202,6 +216,10 @@ class ConturTable(object):
         import pandas as pd
         return pd.DataFrame(data=self.data, columns=self.headers)
 
+    def to_arrow(self):
+        from .export_arrow import table_to_arrow
+        return table_to_arrow(self)
+
     @staticmethod
     def clean_headers(headers):
         clean_headers = []
@@ -264,7 +282,7 @@ class ConturTable(object):
         return clean_headers
 
 
-def dispatch_section(section, name):
+def dispatch_section(section, name, use_schemas=True):
     parsers = {
         'NOZZLE CONTOUR': parse_nozzle_contour,
         'UPSTREAM CONTOUR': parse_upstream_contour,
@@ -285,14 +303,20 @@ def dispatch_section(section, name):
         raise NotImplementedError
     elif num_matches == 1:
         matching_name = parser_list[np.argwhere(matching_keys)[0][0]]
-        return parsers[matching_name](section)
     elif "FROM THROAT CHARACTERISTIC" in section_title and "INVISCID CONTOUR" in section_title:
-        return parse_inviscid_contour(section)
+        matching_name = 'INVISCID CONTOUR'
     else:
         raise Exception("Multiple matches: parsing ambiguous")
 
+    # Tables are sliced at the columns of CONTUR's FORMAT statements; sections that do not fit fall back to the
+    # whitespace-splitting table detection in identify_tables
+    decoded = decode_tables(section, section_schemas[matching_name]) if use_schemas else None
+    return parsers[matching_name](section, decoded)
+
 
 class BaseConturOutput(object):
+    __slots__ = ('raw', 'parameters', 'tables', 'class_name')
+
     def __init__(self, raw, parameters=None, tables=None):
         self.raw = raw
         self.parameters = parameters
@@ -301,14 +325,16 @@ class BaseConturOutput(object):
 
     def __repr__(self):
         return f"{self.class_name}:\n" \
-               f"{len(self.raw):15g} lines\n" \
+               f"{len(self.raw or []):15g} lines\n" \
                f"{len(self.parameters):15g} parameter groups\n" \
                f"{len(self.tables):15g} tables"
 
 
 class ConturOutput(BaseConturOutput):
-    def __init__(self, raw, class_name):
-        tables, table_idx = identify_tables(raw)
+    __slots__ = ()
+
+    def __init__(self, raw, class_name, decoded=None):
+        tables, table_idx = identify_tables(raw) if decoded is None else decoded
         parameters = []
 
         next_table = 1
@@ -332,8 +358,10 @@ class ConturOutput(BaseConturOutput):
 
 
 class ConturUpstreamContour(BaseConturOutput):
-    def __init__(self, raw):
-        tables, table_idx = identify_tables(raw)
+    __slots__ = ()
+
+    def __init__(self, raw, decoded=None):
+        tables, table_idx = identify_tables(raw) if decoded is None else decoded
         parameters = []
 
         next_table = 1
@@ -357,8 +385,10 @@ class ConturUpstreamContour(BaseConturOutput):
 
 
 class ConturInviscidContour(BaseConturOutput):
-    def __init__(self, raw):
-        tables, table_idx = identify_tables(raw)
+    __slots__ = ()
+
+    def __init__(self, raw, decoded=None):
+        tables, table_idx = identify_tables(raw) if decoded is None else decoded
         parameters = []
 
         next_table = 1
@@ -402,8 +432,10 @@ class ConturInviscidContour(BaseConturOutput):
 
 
 class ConturBoundaryLayerCalculations(BaseConturOutput):
-    def __init__(self, raw):
-        tables, table_idx = identify_tables(raw)
+    __slots__ = ()
+
+    def __init__(self, raw, decoded=None):
+        tables, table_idx = identify_tables(raw) if decoded is None else decoded
         parameters = []
 
         next_table = 1
@@ -461,16 +493,16 @@ class ConturBoundaryLayerCalculations(BaseConturOutput):
         return params
 
 
-def parse_nozzle_contour(section):
-    return ConturOutput(section, "ConturNozzleContour")
+def parse_nozzle_contour(section, decoded=None):
+    return ConturOutput(section, "ConturNozzleContour", decoded)
 
 
-def parse_upstream_contour(section):
-    return ConturUpstreamContour(section)
+def parse_upstream_contour(section, decoded=None):
+    return ConturUpstreamContour(section, decoded)
 
 
-def parse_intermediate_right_characteristic(section):
-    co = ConturOutput(section, "ConturIntermediateRightCharacteristic")
+def parse_intermediate_right_characteristic(section, decoded=None):
+    co = ConturOutput(section, "ConturIntermediateRightCharacteristic", decoded)
     new_headers = co.tables[0].headers
     new_headers[0] = "POINT"
     new_headers[1] = "X"
@@ -478,8 +510,8 @@ def parse_intermediate_right_characteristic(section):
     return co
 
 
-def parse_intermediate_left_characteristic(section):
-    co = ConturOutput(section, "ConturIntermediateLeftCharacteristic")
+def parse_intermediate_left_characteristic(section, decoded=None):
+    co = ConturOutput(section, "ConturIntermediateLeftCharacteristic", decoded)
     new_headers = co.tables[0].headers
     new_headers[0] = "POINT"
     new_headers[1] = "X"
@@ -487,23 +519,23 @@ def parse_intermediate_left_characteristic(section):
     return co
 
 
-def parse_boundary_layer_calculations(section):
+def parse_boundary_layer_calculations(section, decoded=None):
     if 'STA' in section[5]:
-        return ConturOutput(section, "ConturBoundaryLayerCalculations")
+        return ConturOutput(section, "ConturBoundaryLayerCalculations", decoded)
     else:
-        return ConturBoundaryLayerCalculations(section)
+        return ConturBoundaryLayerCalculations(section, decoded)
 
 
-def parse_inviscid_contour(section):
-    return ConturInviscidContour(section)
+def parse_inviscid_contour(section, decoded=None):
+    return ConturInviscidContour(section, decoded)
 
 
-def parse_throat_velocity_distribution(section):
-    return ConturOutput(section, "ConturThroatVelocityDistribution")
+def parse_throat_velocity_distribution(section, decoded=None):
+    return ConturOutput(section, "ConturThroatVelocityDistribution", decoded)
 
 
-def parse_throat_characteristic(section):
-    co = ConturOutput(section, "ConturThroatCharacteristic")
+def parse_throat_characteristic(section, decoded=None):
+    co = ConturOutput(section, "ConturThroatCharacteristic", decoded)
     new_headers = co.tables[0].headers
     new_headers[0] = "POINT"
     new_headers[1] = "X"
@@ -511,8 +543,8 @@ def parse_throat_characteristic(section):
     return co
 
 
-def parse_coordinates_and_derivatives(section):
-    return ConturOutput(section, "ConturCoordinatesAndDerivatives")
+def parse_coordinates_and_derivatives(section, decoded=None):
+    return ConturOutput(section, "ConturCoordinatesAndDerivatives", decoded)
 
 
 def post_process(contur_results):
@@ -551,9 +583,34 @@ def get_project_slices(lines, title):
 
 
 class ConturResult(object):
-    def __init__(self, filename, refine_amt=21):
-        with open(filename, 'r') as in_file:
-            self.raw = in_file.readlines()
+    def __init__(self, filename, refine_amt=21, lean=False):
+        # .gz, .xz and .zst outputs are decompressed while they are read
+        with open_file(filename, 'rt') as in_file:
+            raw = in_file.readlines()
+        self._parse(raw, refine_amt, lean)
+
+    @classmethod
+    def from_text(cls, text, refine_amt=21, lean=False):
+        result = cls.__new__(cls)
+        result._parse(text.splitlines(keepends=True), refine_amt, lean)
+        return result
+
+    @staticmethod
+    def load_many(paths_or_glob, workers=1, refine_amt=21, lean=True, cache_dir=None, executor=None,
+                  transport='pickle'):
+        from .bulk_load import load_many
+        return load_many(paths_or_glob, workers=workers, refine_amt=refine_amt, lean=lean, cache_dir=cache_dir,
+                         executor=executor, transport=transport)
+
+    def release_raw(self):
+        # Drops the output text once parsed: only the parameters and tables are kept
+        self.raw = None
+        for section in self.sections:
+            section.raw = None
+
+    def _parse(self, raw, refine_amt, lean=False):
+        self._spline = None
+        self.raw = raw
 
         self.title = get_project_title(self.raw)
         section_slices = get_project_slices(self.raw, self.title)
@@ -601,6 +658,9 @@ class ConturResult(object):
         except TypeError:
             self.design_mach = None
 
+        # Planar runs (JD = -1) print the 2-D height where axisymmetric ones print GMACH
+        self.planar = any('2-D H=' in line for line in self.raw)
+
         self.contour_tables = []
         for contour in self.contours:
             if len(contour.tables) == 0:
@@ -635,6 +695,9 @@ class ConturResult(object):
             self._coordinates = None
             self.coordinates = None
 
+        if lean:
+            self.release_raw()
+
     @staticmethod
     def _cubic_spline(x1, x2, y1, y2, s1, s2, n_pts=21):
         pow0 = np.array([3, 2, 1, 0])
@@ -666,8 +729,53 @@ class ConturResult(object):
             n_pts
         )).T for idx in range(len(x) - 1)])
 
+    def _wall_spline(self):
+        # Cubic on each interval between CONTUR coordinates, matching the values and slopes (DY/DX) at both ends
+        if self._spline is None:
+            if self._coordinates is None:
+                raise Exception("No wall coordinates were read from the CONTUR output")
+            arr = self._coordinates.to_numpy()
+            arr = arr[arr[:, 0].argsort()]
+            keep = np.hstack([True, np.diff(arr[:, 0]) > 0])
+            x = arr[keep, 0]
+            y = arr[keep, 1]
+            s = arr[keep, 2]
+
+            h = np.diff(x)
+            secant = np.diff(y) / h
+            coefficients = np.vstack([y[:-1], s[:-1],
+                                      (3 * secant - 2 * s[:-1] - s[1:]) / h,
+                                      (s[:-1] + s[1:] - 2 * secant) / h ** 2])
+            self._spline = (x, coefficients)
+        return self._spline
+
+    def evaluate(self, x, derivative=0):
+        knots, coefficients = self._wall_spline()
+        x = np.asarray(x, dtype=float)
+
+        idx = np.clip(np.searchsorted(knots, x, side='right') - 1, 0, len(knots) - 2)
+        dx = x - knots[idx]
+        c0, c1, c2, c3 = coefficients[:, idx]
+
+        if derivative == 0:
+            values = ((c3 * dx + c2) * dx + c1) * dx + c0
+        elif derivative == 1:
+            values = (3 * c3 * dx + 2 * c2) * dx + c1
+        elif derivative == 2:
+            values = 6 * c3 * dx + 2 * c2
+        else:
+            raise ValueError(f"derivative must be 0, 1 or 2, not {derivative}")
+
+        return np.where((x < knots[0]) | (x > knots[-1]), np.nan, values)
+
     def __repr__(self):
-        return f"ConturResult:\n{len(self.raw):15g} raw lines\n{len(self.sections):15g} output sections"
+        raw_lines = "released" if self.raw is None else f"{len(self.raw):g}"
+        return f"ConturResult:\n{raw_lines:>15s} raw lines\n{len(self.sections):15g} output sections"
+
+    def metrics(self, names=None, gamma=1.4):
+        from .metrics import result_metrics
+        return result_metrics(self, names, gamma)
 
-    def save_all(self, directory):
-        return save_all(self, directory)
+    def save_all(self, directory, compression=None):
+        from .create_report import save_all
+        return save_all(self, directory, compression)
@@ -3,16 +3,31 @@ import subprocess
 import os
 import shutil
 import glob
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from .read_output import ConturResult
+from . import f2py_backend
+from .shared_results import call_shared, from_shared, discard_shared
+from .pipeline import iter_pipeline
+from .compressed import compressed_name, copy_file, write_text
 
 
 class ConturApplication(object):
-    def __init__(self, location=os.getcwd(), timeout=0.5, executable=None):
+    def __init__(self, location=os.getcwd(), timeout=0.5, executable=None, backend='executable'):
         self.location = location
         self.timeout = timeout
+        self.backend = backend
 
-        if executable is None:
+        if backend == 'f2py':
+            executable = f2py_backend.extension_path() if executable is None else executable
+            if executable is None:
+                raise Exception("CONTUR f2py extension not built: run conturpy.f2py_backend.build_extension()")
+        elif backend != 'executable':
+            raise Exception(f"Backend {backend} is not supported")
+        elif executable is None:
             bin_path = Path(__file__).parent.joinpath('bin/')
             plat = platform.system()
             if plat == 'Windows':
@@ -26,6 +41,10 @@ class ConturApplication(object):
 
     def run(self):
         assert self._exists
+        if self.backend == 'f2py':
+            return f2py_backend.run_files(os.path.join(self.location, 'input.txt'),
+                                          os.path.join(self.location, 'output.txt'), self.executable,
+                                          timeout=self.timeout)
         try:
             subprocess.check_output(self.executable, timeout=self.timeout, cwd=self.location)
             success = True
@@ -33,37 +52,186 @@ class ConturApplication(object):
             success = False
         return success
 
-    def _run_single_file(self, file, output_dir, refine_amt=21):
+    def run_deck(self, deck):
+        if self.backend == 'f2py':
+            return f2py_backend.run_deck(deck, self.executable, timeout=self.timeout)
+
+        with tempfile.TemporaryDirectory() as wd:
+            with open(os.path.join(wd, 'input.txt'), 'w') as out_file:
+                out_file.write(deck)
+            try:
+                subprocess.check_output(self.executable, timeout=self.timeout, cwd=wd, stderr=subprocess.DEVNULL)
+            except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
+                return None
+            output_file = os.path.join(wd, 'output.txt')
+            if not os.path.exists(output_file):
+                return None
+            with open(output_file, 'r') as in_file:
+                text = in_file.read()
+        return text if text.strip() else None
+
+    def _run_single_file(self, file, output_dir, refine_amt=21, lean=False, compression=None):
         shutil.copyfile(file, os.path.join(self.location, 'input.txt'))
         success = self.run()
         if success:
-            flag, newfile = self._move_output(like_source_fn=file, dest_folder=output_dir)
+            flag, newfile = self._move_output(like_source_fn=file, dest_folder=output_dir,
+                                              src=os.path.join(self.location, 'output.txt'), compression=compression)
             os.remove(file)
 
             if flag == 1:
-                return ConturResult(newfile, refine_amt=refine_amt)
+                return ConturResult(newfile, refine_amt=refine_amt, lean=lean)
             else:
                 return None
 
-    def batch_input_files(self, file_list, output_dir=os.getcwd(), refine_amt=21):
+    def batch_input_files(self, file_list, output_dir=os.getcwd(), refine_amt=21, lean=False, compression=None):
         results = []
         for file in file_list:
-            results.append(self._run_single_file(file, output_dir, refine_amt=refine_amt))
+            results.append(self._run_single_file(file, output_dir, refine_amt=refine_amt, lean=lean,
+                                                 compression=compression))
         results = [x for x in results if x is not None]
         self.clean_wd()
         return results
 
-    def batch_input_folder(self, folder, output_dir=os.getcwd(), refine_amt=21):
+    def batch_input_folder(self, folder, output_dir=os.getcwd(), refine_amt=21, lean=False, compression=None):
         results = []
         for file in glob.glob(os.path.join(folder, '*.txt')):
-            results.append(self._run_single_file(file, output_dir, refine_amt=refine_amt))
+            results.append(self._run_single_file(file, output_dir, refine_amt=refine_amt, lean=lean,
+                                                 compression=compression))
         results = [x for x in results if x is not None]
         self.clean_wd()
         return results
 
+    def iter_batch(self, inputs, output_dir=None, refine_amt=21, lean=False, workers=1, max_pending=None,
+                   executor=None, validate=True, transport='pickle', compression=None):
+        # Yields (input, ConturResult or the exception of a failed run) as runs complete. Inputs are input card files
+        # or ConturSettings; at most max_pending runs are queued at once so results can be consumed as they arrive.
+        # ConturSettings that fail validate() are yielded with the exception without running CONTUR. With
+        # transport='shared_memory' pool workers return result arrays in shared memory instead of pickling them.
+        # Outputs saved to output_dir are compressed with compression ('gz', 'xz' or 'zst') if given.
+        if transport not in ('pickle', 'shared_memory'):
+            raise Exception(f"Transport {transport} is not supported")
+        jobs = ((item, self._batch_output_file(item, idx, output_dir, compression)) for idx, item in enumerate(inputs))
+
+        if executor is None and workers == 1:
+            for item, output_file in jobs:
+                error = self._preflight(item) if validate else None
+                if error is not None:
+                    yield item, error
+                    continue
+                try:
+                    yield item, _run_batch_item(self, item, output_file, refine_amt, lean)
+                except Exception as err:
+                    yield item, err
+            return
+
+        own_executor = executor is None
+        executor = ProcessPoolExecutor(workers) if own_executor else executor
+        max_pending = 2 * workers if max_pending is None else max_pending
+        pending = {}
+        broken = None
+        try:
+            for item, output_file in jobs:
+                error = self._preflight(item) if validate else None
+                if error is not None:
+                    yield item, error
+                    continue
+                if broken is not None:
+                    yield item, broken
+                    continue
+                try:
+                    future = self._submit(executor, item, output_file, refine_amt, lean, transport)
+                except BrokenProcessPool as err:
+                    # A worker died (killed, or a crash in an extension). The runs in flight fail with the pool, but
+                    # a pool of our own is replaced so the remaining inputs still run. A pool passed in cannot be,
+                    # so the remaining inputs are yielded with the error.
+                    import warnings
+                    while pending:
+                        yield from self._collect(pending, transport)
+                    if not own_executor:
+                        warnings.warn(f"Process pool broke: the remaining inputs are not run ({err})")
+                        broken = err
+                        yield item, err
+                        continue
+                    warnings.warn(f"Process pool broke, starting a new one ({err})")
+                    executor.shutdown(cancel_futures=True)
+                    executor = ProcessPoolExecutor(workers)
+                    future = self._submit(executor, item, output_file, refine_amt, lean, transport)
+                pending[future] = item
+                if len(pending) >= max_pending:
+                    yield from self._collect(pending, transport)
+            while pending:
+                yield from self._collect(pending, transport)
+        finally:
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(cancel_futures=True)
+            if transport == 'shared_memory':
+                for future in pending:
+                    if not future.cancelled() and future.exception() is None:
+                        discard_shared(future.result())
+
+    def pipeline(self, inputs, output_dir=None, report_dir=None, refine_amt=21, lean=False, run_workers=2,
+                 parse_workers=1, report_workers=1, queue_size=4, validate=True, transport='pickle', compression=None):
+        # Like iter_batch, but runs, parsing and save_all reports (one folder per run in report_dir) are separate
+        # stages that overlap, each with its own number of workers
+        return iter_pipeline(self, inputs, output_dir=output_dir, report_dir=report_dir, refine_amt=refine_amt,
+                             lean=lean, run_workers=run_workers, parse_workers=parse_workers,
+                             report_workers=report_workers, queue_size=queue_size, validate=validate,
+                             transport=transport, compression=compression)
+
+    def iter_adaptive(self, inputs, output_dir=None, refine_amt=21, lean=False, controller=None, validate=True,
+                      compression=None, **controller_options):
+        # Like iter_batch, with the number of simultaneous runs tuned as they complete by a ConcurrencyController
+        # (built from controller_options, e.g. max_workers=16, cpu_limit=.9, memory_limit=2000, if not given)
+        from .adaptive import iter_adaptive, ConcurrencyController
+        controller = ConcurrencyController(**controller_options) if controller is None else controller
+        return iter_adaptive(self, inputs, output_dir=output_dir, refine_amt=refine_amt, lean=lean,
+                             controller=controller, validate=validate, compression=compression)
+
+    @staticmethod
+    def _preflight(item):
+        if not hasattr(item, 'validate'):
+            return None
+        try:
+            item.validate()
+        except Exception as err:
+            return err
+        return None
+
+    def _submit(self, executor, item, output_file, refine_amt, lean, transport='pickle'):
+        if transport == 'shared_memory':
+            return executor.submit(call_shared, _run_batch_item, self, item, output_file, refine_amt, lean)
+        return executor.submit(_run_batch_item, self, item, output_file, refine_amt, lean)
+
+    @staticmethod
+    def _collect(pending, transport='pickle'):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as err:
+                yield item, err
+                continue
+            yield item, from_shared(result) if transport == 'shared_memory' else result
+
+    @staticmethod
+    def _run_name(item, idx):
+        if hasattr(item, 'get_deck'):
+            return f"{item['ITLE'].strip().replace(' ', '_')}_{idx}"
+        return os.path.splitext(os.path.split(item)[-1])[0]
+
+    @staticmethod
+    def _batch_output_file(item, idx, output_dir, compression=None):
+        if output_dir is None:
+            return None
+        return compressed_name(os.path.join(output_dir, f"{ConturApplication._run_name(item, idx)}_result.txt"),
+                               compression)
+
     @staticmethod
     def _move_output(dest_fn=None, like_source_fn=None, dest_folder=None,
-                     src=os.path.join(os.getcwd(), 'output.txt')):
+                     src=os.path.join(os.getcwd(), 'output.txt'), compression=None):
         if not os.path.exists(src):
             return -1, None
         if like_source_fn is not None:
@@ -73,7 +241,7 @@ class ConturApplication(object):
 
         dest_folder = os.getcwd() if dest_folder is None else dest_folder
         newfile = os.path.join(dest_folder, dest_fn)
-        shutil.copyfile(src, newfile)
+        newfile = copy_file(src, newfile, compression)
 
         return 1, newfile
 
@@ -100,7 +268,29 @@ class ConturApplication(object):
             return True
 
     def __repr__(self):
+        if self.backend == 'f2py':
+            return f"CONTUR f2py extension at {self.executable}"
         if self._exists():
             return f"CONTUR Executable at {self.executable}"
         else:
             return f"CONTUR Executable NOT FOUND (expected at {self.executable})"
+
+
+def _run_batch_item(application, item, output_file=None, refine_amt=21, lean=False):
+    if hasattr(item, 'get_deck'):
+        deck = item.get_deck()
+    else:
+        with open(item, 'r') as in_file:
+            deck = in_file.read()
+
+    start = time.perf_counter()
+    text = application.run_deck(deck)
+    if text is None:
+        raise Exception("CONTUR produced no output (timeout or abnormal termination)")
+
+    if output_file is not None:
+        write_text(output_file, text)
+    result = ConturResult.from_text(text, refine_amt=refine_amt, lean=lean)
+    # The worker's own wall time for this item (run, write and parse), free of queueing in the pool
+    result.run_time = time.perf_counter() - start
+    return result
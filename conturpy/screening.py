@@ -0,0 +1,99 @@
+import copy
+import numpy as np
+
+
+def inviscid_settings(settings):
+    # The cheap deck for a design: no boundary layer correction (JB = 0, no card B) and no smoothing of the upstream
+    # contour (NF > 0, no card A), keeping the same grid and design parameters
+    cheap = copy.deepcopy(settings)
+    cheap._include_bl = False
+    cheap._smooth_inviscid_contour = False
+    cheap._smooth_before_spline = False
+    cheap['JB'] = 0
+    cheap['NF'] = abs(settings['NF'])
+    return cheap
+
+
+class ScreeningCandidate(object):
+    def __init__(self, index, settings):
+        self.index = index
+        self.settings = settings
+        self.screening_score = None
+        self.score = None
+        self.result = None
+        self.error = None
+        self.shortlisted = False
+
+    def __repr__(self):
+        screening = "failed" if self.screening_score is None else f"{self.screening_score:.6g}"
+        full = "" if not self.shortlisted else \
+            f", full {'failed' if self.score is None else f'{self.score:.6g}'}"
+        return f"ScreeningCandidate ({self.settings['ITLE'].strip()}: screening {screening}{full})"
+
+
+class ConturScreening(object):
+    def __init__(self, candidates, objective, top_k=10, minimize=True, cheap=inviscid_settings):
+        # objective maps a ConturResult to a number; candidates are ConturSettings of the full (boundary layer
+        # corrected) decks, and cheap turns one into its screening deck
+        self.candidates = [ScreeningCandidate(idx, settings) for idx, settings in enumerate(candidates)]
+        self.objective = objective
+        self.top_k = top_k
+        self.minimize = minimize
+        self.cheap = cheap
+        self.ranking = None
+
+    def _score(self, candidate, result):
+        if isinstance(result, Exception):
+            candidate.error = result
+            return None
+        try:
+            score = float(self.objective(result))
+        except Exception as err:
+            candidate.error = err
+            return None
+        return None if np.isnan(score) else score
+
+    def _order(self, candidates, key):
+        scored = [x for x in candidates if key(x) is not None]
+        return sorted(scored, key=key, reverse=not self.minimize) + [x for x in candidates if key(x) is None]
+
+    def run(self, application, workers=1, refine_amt=21, lean=True):
+        cheap_decks = [self.cheap(x.settings) for x in self.candidates]
+        by_deck = {id(deck): candidate for deck, candidate in zip(cheap_decks, self.candidates)}
+        for settings, result in application.iter_batch(cheap_decks, refine_amt=refine_amt, lean=lean, workers=workers):
+            candidate = by_deck[id(settings)]
+            candidate.screening_score = self._score(candidate, result)
+
+        shortlist = [x for x in self._order(self.candidates, lambda x: x.screening_score)[:self.top_k]
+                     if x.screening_score is not None]
+        by_settings = {id(x.settings): x for x in shortlist}
+        for candidate in shortlist:
+            candidate.shortlisted = True
+        for settings, result in application.iter_batch([x.settings for x in shortlist], refine_amt=refine_amt,
+                                                       lean=lean, workers=workers):
+            candidate = by_settings[id(settings)]
+            candidate.score = self._score(candidate, result)
+            if candidate.score is not None:
+                candidate.result = result
+
+        return self.rank()
+
+    def rank(self):
+        # Shortlisted designs by their full score come first, then the others by their screening score. A shortlisted
+        # design whose full run failed goes after those that completed.
+        completed = [x for x in self.candidates if x.score is not None]
+        others = [x for x in self.candidates if x.score is None]
+        self.ranking = self._order(completed, lambda x: x.score) + self._order(others, lambda x: x.screening_score)
+        return self.ranking
+
+    def best(self):
+        if not self.ranking or self.ranking[0].score is None:
+            raise Exception("Screening has no completed full run")
+        return self.ranking[0]
+
+    def __repr__(self):
+        n_screened = len([x for x in self.candidates if x.screening_score is not None])
+        lines = [f"ConturScreening ({len(self.candidates)} candidates, {n_screened} screened, top {self.top_k}):"]
+        if self.ranking is not None:
+            lines += [f"    {rank + 1:4d} {x}" for rank, x in enumerate(self.ranking[:self.top_k])]
+        return "\n".join(lines)
@@ -0,0 +1,105 @@
+import copy
+import numpy as np
+from .surrogate import throat_location, bl_thickness
+
+
+def sample_result(r, x):
+    # Wall radius, boundary layer thickness and displacement thickness at distances x from the throat, plus scalars
+    x_throat, r_throat = throat_location(r)
+    samples = {'y': r.evaluate(x_throat + x)}
+    for name, column in (('delta', 'DELTA'), ('delta_star', 'DELTAstar__1')):
+        bl = bl_thickness(r, column)
+        samples[name] = np.full(x.shape, np.nan) if bl is None else \
+            np.interp(x_throat + x, bl[0], bl[1], left=np.nan, right=np.nan)
+    samples['nozzle_length'] = r.nozzle_length
+    samples['throat_radius'] = r_throat
+    samples['exit_radius'] = float(r.evaluate(x_throat + r.nozzle_length))
+    return samples
+
+
+class ConturJacobian(object):
+    def __init__(self, settings, labels, step=1e-3, steps=None, scheme='central', n_pts=201, baseline=None):
+        if scheme not in ('central', 'forward'):
+            raise Exception(f"Finite difference scheme {scheme} is not supported")
+        integers = [label for label in labels if settings.is_integer(label)]
+        if integers:
+            # A fractional step can't be written to an integer field, and a whole one is no derivative
+            raise Exception(f"Jacobian: {', '.join(integers)} are integer card fields and can't be differentiated")
+        self.settings = settings
+        self.labels = list(labels)
+        self.scheme = scheme
+        self.n_pts = n_pts
+        self.baseline = baseline
+
+        # Relative steps by default; labels that are zero (or listed in steps) get an absolute step
+        steps = {} if steps is None else steps
+        self.steps = {label: steps.get(label, step * abs(settings[label]) if settings[label] != 0 else step)
+                      for label in self.labels}
+
+        self.x = None
+        self.values = None
+        self.jacobian = None
+
+    def _perturbed(self, label, sign):
+        perturbed = copy.deepcopy(self.settings)
+        perturbed[label] = self.settings[label] + sign * self.steps[label]
+        return perturbed
+
+    def decks(self):
+        signs = (1, -1) if self.scheme == 'central' else (1,)
+        return [(label, sign, self._perturbed(label, sign)) for label in self.labels for sign in signs]
+
+    def run(self, application, workers=1, refine_amt=21, lean=True):
+        decks = self.decks()
+        inputs = [x[2] for x in decks]
+        if self.baseline is None:
+            inputs.append(self.settings)
+
+        results = {}
+        for settings, result in application.iter_batch(inputs, refine_amt=refine_amt, lean=lean, workers=workers):
+            if isinstance(result, Exception):
+                import warnings
+                warnings.warn(f"Jacobian: run failed ({result})")
+                result = None
+            results[id(settings)] = result
+
+        if self.baseline is None:
+            self.baseline = results[id(self.settings)]
+            if self.baseline is None:
+                raise Exception("Jacobian: the baseline run failed")
+
+        return self._assemble([(label, sign, results[id(settings)]) for label, sign, settings in decks])
+
+    def _assemble(self, runs):
+        # Outputs are compared at the same distances from each run's own throat, over the baseline nozzle length
+        self.x = np.linspace(0, self.baseline.nozzle_length, self.n_pts)
+        base = sample_result(self.baseline, self.x)
+        self.values = base
+
+        samples = {}
+        for label, sign, result in runs:
+            samples[(label, sign)] = None if result is None else sample_result(result, self.x)
+
+        self.jacobian = {name: np.full((len(self.labels), *np.shape(value)), np.nan) for name, value in base.items()}
+        for idx, label in enumerate(self.labels):
+            plus = samples[(label, 1)]
+            minus = samples.get((label, -1), base) if self.scheme == 'central' else base
+            if plus is None or minus is None:
+                continue
+            span = 2 * self.steps[label] if self.scheme == 'central' else self.steps[label]
+            for name in base:
+                self.jacobian[name][idx] = (np.asarray(plus[name]) - np.asarray(minus[name])) / span
+        return self
+
+    def __getitem__(self, name):
+        return self.jacobian[name]
+
+    def __repr__(self):
+        lines = [f"ConturJacobian ({self.scheme}, {len(self.labels)} inputs):"]
+        if self.jacobian is None:
+            return lines[0] + "\n    not run"
+        for idx, label in enumerate(self.labels):
+            lines.append(f"    d/d{label:<6s} nozzle_length {self.jacobian['nozzle_length'][idx]:12.5g}   "
+                         f"exit_radius {self.jacobian['exit_radius'][idx]:12.5g}   "
+                         f"max |dy| {np.nanmax(np.abs(self.jacobian['y'][idx])):12.5g}")
+        return "\n".join(lines)
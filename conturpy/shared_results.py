@@ -0,0 +1,91 @@
+import pickle
+import weakref
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+_ALIGN = 64
+
+
+class SharedPayload(object):
+    # What crosses the process boundary: the pickled object without its arrays, and where each array sits in the block
+    def __init__(self, name, size, data, layout):
+        self.name = name
+        self.size = size
+        self.data = data
+        self.layout = layout
+
+    def __repr__(self):
+        return f"SharedPayload ({len(self.layout)} arrays, {self.size} bytes in {self.name}, " \
+               f"{len(self.data)} bytes pickled)"
+
+
+def _create_untracked(size):
+    # The receiving process owns the block. Left registered, the worker's resource tracker would unlink it when the
+    # worker exits, possibly before the parent has attached to it.
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def to_shared(obj, min_bytes=1024):
+    # Pickles obj with protocol 5, moving the data of every contiguous array of at least min_bytes out of band into
+    # one new shared memory block
+    buffers = []
+
+    def keep_out_of_band(buffer):
+        if buffer.raw().nbytes < min_bytes:
+            return True
+        buffers.append(buffer)
+        return False
+
+    data = pickle.dumps(obj, protocol=5, buffer_callback=keep_out_of_band)
+
+    layout = []
+    size = 0
+    for buffer in buffers:
+        start = -(-size // _ALIGN) * _ALIGN
+        layout.append((start, buffer.raw().nbytes))
+        size = start + layout[-1][1]
+
+    if not buffers:
+        return SharedPayload(None, 0, data, layout)
+
+    shm = _create_untracked(max(size, 1))
+    try:
+        for buffer, (start, n_bytes) in zip(buffers, layout):
+            shm.buf[start:start + n_bytes] = buffer.raw()
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return SharedPayload(shm.name, size, data, layout)
+
+
+def from_shared(payload):
+    # Rebuilds the object with its arrays as views on the block, without copying them. The block's name is removed at
+    # once; its memory is released when the last array viewing it is garbage collected.
+    if payload.name is None:
+        return pickle.loads(payload.data)
+
+    shm = shared_memory.SharedMemory(name=payload.name)
+    root = np.ndarray((payload.size,), np.uint8, buffer=shm.buf)
+    weakref.finalize(root, shm.close)
+    shm.unlink()
+    return pickle.loads(payload.data, buffers=[root[start:start + n_bytes] for start, n_bytes in payload.layout])
+
+
+def discard_shared(payload):
+    # Frees a block that will not be received, e.g. when a consumer stops early
+    if payload.name is not None:
+        shm = shared_memory.SharedMemory(name=payload.name)
+        shm.close()
+        shm.unlink()
+
+
+def call_shared(func, *args, **kwargs):
+    # For executor.submit: runs func in the worker and returns its result through shared memory
+    return to_shared(func(*args, **kwargs))
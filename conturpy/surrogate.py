@@ -0,0 +1,226 @@
+import numpy as np
+from scipy.interpolate import RBFInterpolator
+from .read_output import ConturResult
+
+
+def throat_location(r):
+    knots, _ = r._wall_spline()
+    y = r.evaluate(knots)
+    idx = np.argmin(y)
+    return knots[idx], y[idx]
+
+
+def bl_thickness(r, column='DELTA'):
+    delta_tables = [x.tables[0] for x in r.bl_calculations if len(x.tables) > 0 and column in x.tables[0].headers]
+    station_tables = [x.tables[0] for x in r.bl_calculations if len(x.tables) > 0 and 'STA_IN' in x.tables[0].headers]
+    if not delta_tables or not station_tables:
+        return None
+
+    delta = getattr(delta_tables[-1], column)
+    stations = station_tables[-1].STA_IN
+    if len(delta) != len(stations):
+        return None
+
+    order = np.argsort(stations)
+    return stations[order], delta[order]
+
+
+def contour_features(r, n_pts=201):
+    # Wall radius and BL thickness in throat radii at fractions of the nozzle length, plus the length in throat radii
+    x_throat, r_throat = throat_location(r)
+    fraction = np.linspace(0, 1, n_pts)
+    x = x_throat + fraction * r.nozzle_length
+
+    y = r.evaluate(x) / r_throat
+    if np.any(np.isnan(y)):
+        raise ValueError("Coordinates do not cover the full nozzle length")
+
+    bl = bl_thickness(r)
+    delta = None if bl is None else np.interp(x, bl[0], bl[1]) / r_throat
+
+    return r.nozzle_length / r_throat, y, delta
+
+
+def contour_error(length1, y1, length2, y2):
+    # Largest wall radius difference in throat radii, with the shorter nozzle continued at its exit radius
+    fraction = np.linspace(0, 1, len(y1))
+    x = fraction * max(length1, length2)
+    return np.max(np.abs(np.interp(x, fraction * length1, y1) - np.interp(x, fraction * length2, y2)))
+
+
+class ConturPrediction(object):
+    def __init__(self, x, y, nozzle_length, bl_thickness, error, result=None):
+        self.x = x
+        self.y = y
+        self.nozzle_length = nozzle_length
+        self.bl_thickness = bl_thickness
+        self.error = error
+        self.result = result
+
+    def __repr__(self):
+        if self.result is None:
+            source = "surrogate"
+        else:
+            source = "CONTUR run" if self.error == 0 else "surrogate, unusable CONTUR result attached"
+        return f"ConturPrediction ({source}):\n" \
+               f"{self.nozzle_length:15g} nozzle length\n" \
+               f"{self.y[-1]:15g} exit radius\n" \
+               f"{self.error:15g} estimated error [throat radii]"
+
+
+class ConturSurrogate(object):
+    def __init__(self, settings, results, inputs=("CMC", "RC"), n_pts=201, kernel='thin_plate_spline',
+                 smoothing=0.0):
+        self.inputs = list(inputs)
+        self.n_pts = n_pts
+        self.kernel = kernel
+        self.smoothing = smoothing
+
+        self._points = []
+        self._lengths = []
+        self._contours = []
+        self._bl = []
+        for setting, result in zip(settings, results):
+            self._append(setting, result)
+
+        self.fit()
+
+    def _values(self, settings):
+        if isinstance(settings, dict) or hasattr(settings, 'get_deck'):
+            return np.array([settings[label] for label in self.inputs], dtype=float)
+        return np.asarray(settings, dtype=float).reshape(len(self.inputs))
+
+    def _append(self, settings, result):
+        try:
+            length, y, delta = contour_features(result, self.n_pts)
+        except Exception as err:
+            import warnings
+            warnings.warn(f"Surrogate: result {getattr(result, 'title', '')} skipped ({err})")
+            return False
+
+        self._points.append(self._values(settings))
+        self._lengths.append(length)
+        self._contours.append(y)
+        self._bl.append(delta)
+        return True
+
+    def _targets(self, idx=None):
+        idx = range(len(self._points)) if idx is None else idx
+        columns = [np.array([self._lengths[k] for k in idx])[:, None], np.vstack([self._contours[k] for k in idx])]
+        if self.has_bl:
+            columns.append(np.vstack([self._bl[k] for k in idx]))
+        return np.hstack(columns)
+
+    def _scale(self, points):
+        return (points - self._lower) / self._span
+
+    def _interpolator(self, idx):
+        return RBFInterpolator(self._scale(np.vstack([self._points[k] for k in idx])), self._targets(idx),
+                               kernel=self.kernel, smoothing=self.smoothing)
+
+    def _split(self, values):
+        length = values[0]
+        y = values[1:self.n_pts + 1]
+        delta = values[self.n_pts + 1:] if self.has_bl else None
+        return length, y, delta
+
+    def fit(self):
+        if len(self._points) < len(self.inputs) + 2:
+            raise ValueError(f"Surrogate needs at least {len(self.inputs) + 2} usable results, "
+                             f"got {len(self._points)}")
+
+        points = np.vstack(self._points)
+        self.has_bl = all(x is not None for x in self._bl)
+        self._lower = points.min(axis=0)
+        self._upper = points.max(axis=0)
+        self._span = np.where(self._upper > self._lower, self._upper - self._lower, 1.0)
+
+        n = len(self._points)
+        self._interp = self._interpolator(range(n))
+
+        # Leave-one-out errors give the error estimate: each point is predicted from all of the others
+        loo_errors = np.full(n, np.inf)
+        for k in range(n):
+            others = [j for j in range(n) if j != k]
+            try:
+                length, y, _ = self._split(self._interpolator(others)(self._scale(points[k][None]))[0])
+                loo_errors[k] = contour_error(length, y, self._lengths[k], self._contours[k])
+            except np.linalg.LinAlgError:
+                pass
+        self.loo_errors = loo_errors
+
+        finite = np.isfinite(loo_errors)
+        fill = loo_errors[finite].max() if np.any(finite) else np.inf
+        self._error_interp = RBFInterpolator(self._scale(points), np.where(finite, loo_errors, fill),
+                                             kernel='linear', degree=0) if np.isfinite(fill) else None
+        return self
+
+    def add(self, settings, result, refit=True):
+        added = self._append(settings, result)
+        if added and refit:
+            self.fit()
+        return added
+
+    def estimate_error(self, settings):
+        values = self._values(settings)
+        if self._error_interp is None or np.any(values < self._lower) or np.any(values > self._upper):
+            return np.inf
+        return max(float(self._error_interp(self._scale(values[None]))[0]), 0.0)
+
+    @staticmethod
+    def _throat_radius(settings, exit_ratio):
+        if not hasattr(settings, 'get_deck'):
+            return 1.0
+        sf = settings["SF"]
+        if sf > 0:
+            return sf
+        elif sf < 0:
+            return -sf / exit_ratio
+        return 1.0
+
+    def _prediction(self, settings, length, y, delta, error, result=None):
+        r_throat = self._throat_radius(settings, y[-1]) if result is None else throat_location(result)[1]
+        x = np.linspace(0, 1, self.n_pts) * length * r_throat
+        return ConturPrediction(x, y * r_throat, length * r_throat, None if delta is None else delta * r_throat,
+                                error, result)
+
+    def predict(self, settings):
+        values = self._values(settings)
+        length, y, delta = self._split(self._interp(self._scale(values[None]))[0])
+        return self._prediction(settings, length, y, delta, self.estimate_error(settings))
+
+    def predict_or_run(self, settings, application, tolerance=0.01, refine_amt=21, update=True):
+        prediction = self.predict(settings)
+        if prediction.error <= tolerance:
+            return prediction
+
+        text = application.run_deck(settings.get_deck())
+        if text is None:
+            import warnings
+            warnings.warn("Surrogate: CONTUR run failed, returning the surrogate prediction")
+            return prediction
+
+        try:
+            result = ConturResult.from_text(text, refine_amt=refine_amt)
+        except Exception as err:
+            import warnings
+            warnings.warn(f"Surrogate: CONTUR output could not be parsed ({err}), returning the surrogate prediction")
+            return prediction
+        try:
+            length, y, delta = contour_features(result, self.n_pts)
+        except ValueError as err:
+            # The run completed but cannot be compared (e.g. XEND short of the exit): it is not added to the
+            # surrogate, and is returned with the prediction
+            import warnings
+            warnings.warn(f"Surrogate: CONTUR result not usable ({err}), returning the surrogate prediction")
+            prediction.result = result
+            return prediction
+        if update:
+            self.add(settings, result)
+        return self._prediction(settings, length, y, delta, 0.0, result)
+
+    def __repr__(self):
+        return f"ConturSurrogate:\n" \
+               f"{len(self._points):15g} results\n" \
+               f"{len(self.inputs):15g} inputs ({', '.join(self.inputs)})\n" \
+               f"{np.max(self.loo_errors):15g} max leave-one-out error [throat radii]"
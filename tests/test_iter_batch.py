@@ -0,0 +1,63 @@
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from conturpy import ConturApplication
+
+
+class KillingApplication(ConturApplication):
+    # Produces no output for every deck, and kills its worker process on the deck titled KILL
+    def run_deck(self, deck):
+        if deck.startswith('KILL'):
+            os._exit(1)
+        time.sleep(.05)
+        return None
+
+
+def decks(tmp_path, titles):
+    files = []
+    for title in titles:
+        path = tmp_path / f"{title}.txt"
+        path.write_text(f"{title}\n")
+        files.append(str(path))
+    return files
+
+
+def test_killed_worker_does_not_lose_inputs(tmp_path):
+    application = KillingApplication(executable='unused')
+    inputs = decks(tmp_path, ['RUN0', 'KILL', *[f'RUN{idx}' for idx in range(1, 9)]])
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        results = dict(application.iter_batch(inputs, workers=2, max_pending=2))
+
+    assert sorted(results) == sorted(inputs)
+    assert isinstance(results[inputs[1]], BrokenProcessPool)
+    # Inputs submitted after the pool broke ran in a new pool: they fail only for having no output
+    late = [results[x] for x in inputs[-4:]]
+    assert all(not isinstance(x, BrokenProcessPool) and 'no output' in str(x) for x in late)
+    assert any('Process pool broke' in str(x.message) for x in caught)
+
+
+def test_killed_worker_in_given_executor(tmp_path):
+    application = KillingApplication(executable='unused')
+    inputs = decks(tmp_path, ['KILL', *[f'RUN{idx}' for idx in range(6)]])
+    with ProcessPoolExecutor(2) as executor, warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = dict(application.iter_batch(inputs, executor=executor, max_pending=2))
+
+    assert sorted(results) == sorted(inputs)
+    assert isinstance(results[inputs[-1]], BrokenProcessPool)
+
+
+def test_killed_worker_in_iter_adaptive(tmp_path):
+    application = KillingApplication(executable='unused')
+    inputs = decks(tmp_path, ['RUN0', 'KILL', *[f'RUN{idx}' for idx in range(1, 9)]])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = dict(application.iter_adaptive(inputs, min_workers=2, max_workers=2))
+
+    assert sorted(results) == sorted(inputs)
+    assert isinstance(results[inputs[1]], BrokenProcessPool)
+    late = [results[x] for x in inputs[-4:]]
+    assert all(not isinstance(x, BrokenProcessPool) and 'no output' in str(x) for x in late)
@@ -0,0 +1,31 @@
+from conturpy import ConturSettings
+
+
+def radial_flow_settings(etad, bmach, cmc=6.):
+    cs = ConturSettings()
+    cs['ITLE'] = "RADIAL"
+    cs['CMC'] = cmc
+    cs['SF'] = .325
+    cs['ETAD'] = etad
+    cs['BMACH'] = bmach
+    return cs
+
+
+def test_default_radial_flow_deck_is_valid():
+    assert radial_flow_settings(10, 4.).validate(raise_error=False) == []
+
+
+def test_negative_prandtl_meyer_angle_is_reported():
+    # EPSI = 26.4 - 80 deg for ETAD=20, BMACH=2: CONTUR gives NaN output for this deck
+    cs = radial_flow_settings(20, 2.)
+    assert abs(cs._radial_flow_epsi() - -53.6) < .1
+    problems = cs.validate(raise_error=False)
+    assert any('EPSI' in x for x in problems)
+
+
+def test_bmach_too_small_is_reported():
+    # CONTUR prints "BMACH IS TOO SMALL TO ALLOW A SOLUTION" and aborts on the next card read
+    problems = radial_flow_settings(5, 2., cmc=5.).validate(raise_error=False)
+    assert any('BMACH (2.0) is too small' in x for x in problems)
+    assert radial_flow_settings(5, 3.9).validate(raise_error=False) != []
+    assert radial_flow_settings(5, 4.).validate(raise_error=False) == []